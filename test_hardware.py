@@ -26,6 +26,12 @@ def check_dependencies():
         print("✓ PyIndi installed")
     except ImportError:
         print("✗ PyIndi not installed")
+    
+    try:
+        import numpy
+        print("✓ NumPy installed")
+    except ImportError:
+        print("✗ NumPy not installed")
 
 def test_gpio_access():
     """Test if the script can access GPIO pins"""
@@ -58,6 +64,13 @@ def main():
     else:
         print("✗ UART device /dev/ttyS0 not found")
     
+    print("\nChecking tuning profile:")
+    profile = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tmc2209", "tuning_profile.json")
+    if os.path.exists(profile):
+        print(f"✓ Tuning profile {profile} exists")
+    else:
+        print("✗ No tuning profile - run tmc2209/characterize.py to measure axis speed limits")
+    
     print("\nTest complete!")
 
 if __name__ == "__main__":
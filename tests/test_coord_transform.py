@@ -0,0 +1,42 @@
+"""Batched transforms agree with the GOTO planner and stay within one night"""
+import numpy as np
+import pytest
+
+from coord_transform import TransformPipeline
+from goto_planner import GotoPlanner, MountLimits, PIER_EAST, local_sidereal_time
+from motion_profile import AxisLimits
+
+UNIX_TIME = 1700000000.0
+LATITUDE = 40.0
+LONGITUDE = 0.0
+STEPS_PER_DEG = 200 * 16 * 100 / 360
+FAST = AxisLimits(max_rate=200000, max_accel=2000000)
+
+
+def test_pier_side_matches_plan_from_home():
+    limits = MountLimits(meridian_limit=15.0)
+    pipeline = TransformPipeline(LATITUDE, LONGITUDE, STEPS_PER_DEG, limits=limits)
+    planner = GotoPlanner(STEPS_PER_DEG, FAST, FAST, LATITUDE, LONGITUDE, limits)
+
+    ra_hours, dec_deg = np.meshgrid(np.arange(0.0, 24.0, 1.5), [-10.0, 20.0, 50.0, 80.0])
+    result = pipeline.transform(ra_hours.ravel(), dec_deg.ravel(), UNIX_TIME)
+    lst = local_sidereal_time(LONGITUDE, UNIX_TIME)
+
+    checked = 0
+    for i in np.flatnonzero(result.valid):
+        # Plan the same (epoch of date) position from home
+        plan = planner.plan((lst - result.ha[i]) / 15.0 % 24.0, result.dec[i], 0.0, 0.0, UNIX_TIME)
+        assert (plan.pier_side == PIER_EAST) == result.pier_east[i]
+        # Only the sky motion during the slew separates the two
+        assert plan.ra_axis == pytest.approx(result.ra_axis[i], abs=0.01)
+        assert plan.dec_axis == pytest.approx(result.dec_axis[i])
+        checked += 1
+    assert checked > 20
+
+
+def test_times_must_fall_within_one_night():
+    pipeline = TransformPipeline(LATITUDE, LONGITUDE, STEPS_PER_DEG)
+    evening = pipeline.night_index(UNIX_TIME) * 86400.0 + 43200.0 + 6 * 3600.0
+    pipeline.transform([5.5, 6.0], [20.0, 20.0], [evening, evening + 10 * 3600.0])
+    with pytest.raises(ValueError, match="more than one night"):
+        pipeline.transform([5.5, 6.0], [20.0, 20.0], [evening, evening + 20 * 3600.0])
@@ -0,0 +1,202 @@
+"""Closed-loop encoder correction against the simulated mount"""
+import sys
+import time
+import types
+import logging
+import importlib
+
+import pytest
+
+from encoders import AxisEncoder, QuadratureDecoder, measure_backlash
+from mount_simulator import SimulatedGPIO, StepperModel, SimulatedEncoder
+from motion_trace import AXIS_DEC
+from motion_profile import load_tuning_profile, axis_backlash
+
+STEP_PIN, DIR_PIN, ENABLE_PIN = 19, 26, 13
+COUNTS_PER_REV = 40000
+STEPS_PER_DEG = 200 * 16 * 100 / 360
+TOLERANCE = 16
+
+
+@pytest.fixture(autouse=True)
+def quiet_simulator():
+    # Forced stalls would otherwise log every missed step
+    logging.getLogger('TelescopeDriver.simulator').setLevel(logging.ERROR)
+
+
+def pulse_train(gpio, steps, rate, direction=1):
+    """Emit steps on the simulated pins at a fixed rate, without a ramp"""
+    gpio.output(ENABLE_PIN, gpio.LOW)
+    gpio.output(DIR_PIN, gpio.HIGH if direction > 0 else gpio.LOW)
+    for _ in range(steps):
+        gpio.output(STEP_PIN, gpio.HIGH)
+        gpio.output(STEP_PIN, gpio.LOW)
+        gpio.sleep(1.0 / rate)
+    # Let the rotor settle (or finish stalling)
+    gpio.sleep(0.5)
+
+
+def make_axis(backlash=0):
+    gpio = SimulatedGPIO()
+    model = StepperModel(backlash=backlash)
+    gpio.attach_axis("DEC", model, STEP_PIN, DIR_PIN, ENABLE_PIN)
+    encoder = AxisEncoder("DEC", SimulatedEncoder(model, COUNTS_PER_REV, gpio.time),
+                          COUNTS_PER_REV, STEPS_PER_DEG, TOLERANCE)
+    return gpio, model, encoder
+
+
+def test_check_within_tolerance():
+    gpio, model, encoder = make_axis()
+    pulse_train(gpio, 2000, 2000)
+    assert model.missed_steps == 0
+    assert encoder.check(2000) == 0
+    assert encoder.corrections == 0
+
+
+def test_check_reports_missed_steps():
+    gpio, model, encoder = make_axis()
+    pulse_train(gpio, 4000, 20000)
+    assert model.missed_steps > TOLERANCE
+
+    correction = encoder.check(4000)
+    # Positive: the axis fell short and has to move further forward
+    assert correction > 0
+    assert correction == pytest.approx(4000 - model.position, abs=encoder.steps_per_count)
+    assert encoder.corrections == 1
+    assert encoder.lost_steps == correction
+
+
+def test_check_sign_follows_direction():
+    gpio, model, encoder = make_axis()
+    pulse_train(gpio, 4000, 20000, direction=-1)
+    assert model.missed_steps > TOLERANCE
+    assert encoder.check(-4000) < 0
+
+
+@pytest.mark.parametrize("lash", [7, 40, 120])
+def test_measure_backlash_finds_simulated_lash(lash):
+    gpio, model, encoder = make_axis(backlash=lash)
+    gpio.output(ENABLE_PIN, gpio.LOW)
+
+    def step(direction):
+        # One microstep at the driver's correction rate
+        gpio.output(DIR_PIN, gpio.HIGH if direction > 0 else gpio.LOW)
+        gpio.output(STEP_PIN, gpio.HIGH)
+        gpio.output(STEP_PIN, gpio.LOW)
+        gpio.sleep(1.0 / 500)
+
+    assert measure_backlash(encoder, step, 2000) == lash
+
+
+def test_decoder_counts_quadrature():
+    decoder = QuadratureDecoder()
+    for a, b in ((0, 0), (0, 1), (1, 1), (1, 0), (0, 0)):
+        decoder.update(a, b)
+    assert decoder.count == 4
+    for a, b in ((1, 0), (1, 1)):
+        decoder.update(a, b)
+    assert decoder.count == 2
+    assert decoder.errors == 0
+
+
+def test_decoder_counts_impossible_transitions():
+    decoder = QuadratureDecoder()
+    decoder.update(0, 0)
+    decoder.update(1, 1)    # Both channels changed: an edge was missed
+    decoder.update(0, 0)
+    decoder.update(0, 1)
+    decoder.update(1, 0)
+    assert decoder.errors == 3
+    assert decoder.count == 1
+
+
+@pytest.fixture
+def indi_telescope(monkeypatch, tmp_path):
+    """The driver module on the simulated mount, with a scratch tuning profile"""
+    monkeypatch.setenv("TELESCOPE_GPIO", "sim")
+    monkeypatch.setenv("TELESCOPE_INDI", "client")
+    monkeypatch.setenv("TELESCOPE_PROFILE", str(tmp_path / "tuning_profile.json"))
+    # PyIndi is only needed for the client base class
+    monkeypatch.setitem(sys.modules, "PyIndi", types.SimpleNamespace(BaseClient=object))
+    monkeypatch.delitem(sys.modules, "indi_telescope", raising=False)
+    module = importlib.import_module("indi_telescope")
+    yield module
+    sys.modules.pop("indi_telescope", None)
+
+
+@pytest.fixture
+def driver(indi_telescope, monkeypatch):
+    # A virtual clock keeps the driver's step timing fast and deterministic
+    gpio = SimulatedGPIO()
+    monkeypatch.setattr(indi_telescope, "GPIO", gpio)
+    monkeypatch.setattr(indi_telescope.time, "sleep", gpio.sleep)
+    driver = indi_telescope.IndiTelescopeDriver()
+    yield driver
+    driver.cleanup()
+
+
+def test_correct_position_recovers_missed_steps(indi_telescope, driver):
+    gpio = indi_telescope.GPIO
+    model = gpio.axes["DEC"][0]
+    encoder = driver.encoders[AXIS_DEC]
+
+    # A slew commanded far beyond the pull-out rate
+    pulse_train(gpio, 4000, 20000)
+    driver.dec_position += 4000 / driver.STEPS_PER_DEG
+    assert model.missed_steps > TOLERANCE
+
+    correction = driver._correct_position(AXIS_DEC)
+    assert correction > TOLERANCE
+    gpio.sleep(0.5)
+
+    error = encoder.position_steps() - driver._commanded_steps(AXIS_DEC)
+    assert abs(error) <= encoder.tolerance_steps
+    assert driver._correct_position(AXIS_DEC) == 0
+
+
+@pytest.fixture
+def tracking_driver(indi_telescope, monkeypatch):
+    # The tracking loop runs on its own thread against the real clock
+    monkeypatch.setattr(indi_telescope, "GPIO", SimulatedGPIO(clock=time.monotonic))
+    driver = indi_telescope.IndiTelescopeDriver()
+    yield driver
+    driver.cleanup()
+
+
+def test_tracking_correction_does_not_stall_tracking(tracking_driver):
+    driver = tracking_driver
+    encoder = driver.encoders[AXIS_DEC]
+    driver.ENCODER_CHECK_INTERVAL = 0.1
+    driver.start_tracking()
+    start = time.monotonic()
+    start_steps = driver.tracking_steps
+
+    # Commanded 1000 steps beyond the axis: two seconds of correction steps
+    driver.dec_position += 1000 / driver.STEPS_PER_DEG
+    time.sleep(3.0)
+    driver.stop_tracking()
+
+    # RA kept its sidereal deadlines while DEC was corrected
+    elapsed = time.monotonic() - start
+    expected = elapsed * driver.SIDEREAL_RATE * driver.STEPS_PER_DEG
+    assert driver.tracking_steps - start_steps == pytest.approx(expected, abs=2)
+    assert encoder.corrections == 1
+    error = encoder.position_steps() - driver._commanded_steps(AXIS_DEC)
+    assert abs(error) <= encoder.tolerance_steps
+
+
+def test_measured_backlash_is_compensated(indi_telescope, driver):
+    model = indi_telescope.GPIO.axes["DEC"][0]
+    encoder = driver.encoders[AXIS_DEC]
+    model.backlash = 40
+
+    assert driver.measure_backlash(AXIS_DEC) == 40
+    profile = load_tuning_profile(driver.TUNING_PROFILE_PATH)
+    assert axis_backlash(profile, "DEC", driver.MICROSTEPS) == 40
+
+    # Reversing moves take up the lash, so the axis lands where commanded
+    for direction in (1, -1, 1):
+        driver.move_dec(0.5, direction)
+        error = encoder.position_steps() - driver._commanded_steps(AXIS_DEC)
+        assert abs(error) <= encoder.tolerance_steps
+    assert encoder.corrections == 0
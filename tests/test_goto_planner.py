@@ -0,0 +1,199 @@
+"""GOTO planner edge cases around the meridian, the pole and the cable wrap"""
+import pytest
+
+from goto_planner import (GotoPlanner, MountLimits, PIER_EAST, PIER_WEST, SIDEREAL_RATE,
+                          local_sidereal_time, axis_to_equatorial, wrap180)
+from motion_profile import AxisLimits
+
+UNIX_TIME = 1700000000.0
+LATITUDE = 40.0
+LONGITUDE = 0.0
+STEPS_PER_DEG = 200 * 16 * 100 / 360
+MERIDIAN_LIMIT = 15.0
+
+# Fast enough that sky motion during a slew stays far below the test margins
+FAST = AxisLimits(max_rate=200000, max_accel=2000000)
+
+
+def make_planner(limits=None, axis_limits=FAST):
+    return GotoPlanner(STEPS_PER_DEG, axis_limits, axis_limits, LATITUDE, LONGITUDE,
+                       limits or MountLimits(meridian_limit=MERIDIAN_LIMIT))
+
+
+def ra_for_hour_angle(hour_angle):
+    """Target RA in hours that sits at the given hour angle at UNIX_TIME"""
+    return (local_sidereal_time(LONGITUDE, UNIX_TIME) - hour_angle) / 15.0 % 24.0
+
+
+def sides(planner, hour_angle, dec, ra_axis_now=0.0):
+    return {side for _, _, side in planner.candidates(hour_angle, dec, ra_axis_now)}
+
+
+@pytest.mark.parametrize("hour_angle, expected", [
+    (-MERIDIAN_LIMIT + 0.5, {PIER_EAST, PIER_WEST}),
+    (-MERIDIAN_LIMIT - 0.5, {PIER_WEST}),
+    (MERIDIAN_LIMIT - 0.5, {PIER_EAST, PIER_WEST}),
+    (MERIDIAN_LIMIT + 0.5, {PIER_EAST}),
+])
+def test_meridian_limit_candidates(hour_angle, expected):
+    assert sides(make_planner(), hour_angle, 30.0) == expected
+
+
+@pytest.mark.parametrize("hour_angle, side", [
+    (-MERIDIAN_LIMIT + 0.5, PIER_WEST),
+    (-MERIDIAN_LIMIT - 0.5, PIER_WEST),
+    (MERIDIAN_LIMIT - 0.5, PIER_EAST),
+    (MERIDIAN_LIMIT + 0.5, PIER_EAST),
+])
+def test_pier_side_from_home(hour_angle, side):
+    plan = make_planner().plan(ra_for_hour_angle(hour_angle), 30.0, 0.0, 0.0, UNIX_TIME)
+    assert plan.pier_side == side
+    assert not plan.flip
+
+
+def test_no_flip_while_target_reachable_on_current_side():
+    # Pier east, pointing at HA +14; a target just east of the meridian is
+    # still within the counterweight limit on the same side
+    planner = make_planner()
+    plan = planner.plan(ra_for_hour_angle(-MERIDIAN_LIMIT + 0.5), 30.0, -76.0, 60.0, UNIX_TIME)
+    assert plan.pier_side == PIER_EAST
+    assert not plan.flip
+    assert plan.dec_move == pytest.approx(0.0)
+
+
+def test_flip_past_meridian_limit():
+    planner = make_planner()
+    plan = planner.plan(ra_for_hour_angle(-MERIDIAN_LIMIT - 0.5), 30.0, -76.0, 60.0, UNIX_TIME)
+    assert plan.pier_side == PIER_WEST
+    assert plan.flip
+    assert plan.dec_axis == pytest.approx(-60.0)
+
+
+def test_time_to_limit():
+    planner = make_planner()
+    plan = planner.plan(ra_for_hour_angle(0.0), 30.0, -90.0, 60.0, UNIX_TIME)
+    # Pier east at the meridian: the RA axis sits at -90 and may track to +15
+    expected = (90.0 + MERIDIAN_LIMIT - wrap180(plan.ra_axis)) / SIDEREAL_RATE
+    assert plan.time_to_limit == pytest.approx(expected)
+    assert plan.time_to_limit == pytest.approx((90.0 + 90.0 + MERIDIAN_LIMIT) / SIDEREAL_RATE, rel=1e-3)
+
+
+def test_pole_exactly_keeps_ra_axis():
+    planner = make_planner()
+    plan = planner.plan(ra_for_hour_angle(30.0), 90.0, 42.0, 0.0, UNIX_TIME)
+    assert plan.ra_axis == 42.0
+    assert plan.ra_move == 0.0
+    assert plan.dec_axis == 0.0
+    assert not plan.flip
+    assert plan.duration == 0.0
+
+
+def test_pole_exactly_from_either_side():
+    planner = make_planner()
+    for dec_axis_now in (60.0, -60.0):
+        plan = planner.plan(ra_for_hour_angle(30.0), 90.0, 10.0, dec_axis_now, UNIX_TIME)
+        assert plan.ra_move == 0.0
+        assert plan.dec_axis == 0.0
+        assert plan.dec_move == pytest.approx(-dec_axis_now)
+
+
+def test_near_pole_points_at_target():
+    planner = make_planner()
+    target_ra = ra_for_hour_angle(30.0)
+    plan = planner.plan(target_ra, 89.9999, 0.0, 0.0, UNIX_TIME)
+
+    assert abs(plan.dec_axis) == pytest.approx(1e-4)
+    assert plan.pier_side == (PIER_EAST if plan.dec_axis >= 0 else PIER_WEST)
+    ra_hours, dec = axis_to_equatorial(plan.ra_axis, plan.dec_axis, LONGITUDE,
+                                       UNIX_TIME + plan.duration)
+    assert dec == pytest.approx(89.9999)
+    assert ra_hours == pytest.approx(target_ra, abs=1e-6)
+
+
+def test_cable_wrap_alternatives():
+    wide = MountLimits(ra_axis_min=-360.0, ra_axis_max=360.0, meridian_limit=MERIDIAN_LIMIT)
+    candidates = list(make_planner(wide).candidates(14.0, 30.0, 0.0))
+    ra_axes = sorted(round(ra, 6) for ra, _, side in candidates if side == PIER_EAST)
+    assert ra_axes == [-76.0, 284.0]
+
+    # The default limits only allow one turn of cable
+    candidates = list(make_planner().candidates(14.0, 30.0, 0.0))
+    ra_axes = sorted(round(ra, 6) for ra, _, side in candidates if side == PIER_EAST)
+    assert ra_axes == [-76.0]
+
+
+def test_cable_wrap_picks_nearest_turn():
+    wide = MountLimits(ra_axis_min=-360.0, ra_axis_max=360.0, meridian_limit=MERIDIAN_LIMIT)
+    plan = make_planner(wide).plan(ra_for_hour_angle(14.0), 30.0, 300.0, 60.0, UNIX_TIME)
+    assert plan.pier_side == PIER_EAST
+    assert plan.ra_axis == pytest.approx(284.0, abs=0.01)
+    assert abs(plan.ra_move) < 20.0
+
+
+def test_cable_wrap_never_swings_counterweight_over():
+    # Pier east at HA -14 on the upper cable turn; the target at HA 100 is
+    # only reachable at 10 or -350, both across the counterweight-up zone
+    wide = MountLimits(ra_axis_min=-360.0, ra_axis_max=360.0, meridian_limit=MERIDIAN_LIMIT)
+    with pytest.raises(ValueError, match="outside the mount limits"):
+        make_planner(wide).plan(ra_for_hour_angle(100.0), 30.0, 256.0, -10.0, UNIX_TIME)
+
+    # With one more quarter turn of cable it goes round through counterweight down
+    wider = MountLimits(ra_axis_min=-360.0, ra_axis_max=450.0, meridian_limit=MERIDIAN_LIMIT)
+    plan = make_planner(wider).plan(ra_for_hour_angle(100.0), 30.0, 256.0, -10.0, UNIX_TIME)
+    assert plan.ra_axis == pytest.approx(370.0, abs=0.01)
+    assert plan.ra_move > 0
+
+
+@pytest.mark.parametrize("ra_from, ra_to, allowed", [
+    (0.0, -76.0, True),
+    (300.0, 284.0, True),
+    (256.0, 10.0, False),
+    (256.0, -350.0, False),
+    (-90.0, 90.0, True),
+    (90.0, 190.0, False),
+    # Tracked past the limit: may return, but not climb further
+    (110.0, 20.0, True),
+    (110.0, 200.0, False),
+])
+def test_allows_sweep(ra_from, ra_to, allowed):
+    limits = MountLimits(ra_axis_min=-360.0, ra_axis_max=360.0, meridian_limit=MERIDIAN_LIMIT)
+    assert limits.allows_sweep(ra_from, ra_to) == allowed
+
+
+def test_below_horizon_rejected():
+    # Dec -60 on the meridian is 10° below the horizon at latitude 40
+    with pytest.raises(ValueError, match="below the horizon"):
+        make_planner().plan(ra_for_hour_angle(0.0), -60.0, 0.0, 0.0, UNIX_TIME)
+
+
+def test_min_altitude_rejected():
+    limits = MountLimits(meridian_limit=MERIDIAN_LIMIT, min_altitude=30.0)
+    with pytest.raises(ValueError, match="below the horizon"):
+        # Altitude on the meridian is 90 - 40 + 10 = 60, but at HA 90° it is ~6°
+        make_planner(limits).plan(ra_for_hour_angle(-90.0), 10.0, 0.0, 0.0, UNIX_TIME)
+
+
+def test_out_of_range_declination_rejected():
+    with pytest.raises(ValueError):
+        make_planner().plan(0.0, 91.0, 0.0, 0.0, UNIX_TIME)
+
+
+def test_arrival_hour_angle_converges():
+    # A slow mount takes long enough for the sky to move noticeably
+    slow = AxisLimits(max_rate=500, max_accel=1000)
+    planner = make_planner(axis_limits=slow)
+    plan = planner.plan(ra_for_hour_angle(10.0), 30.0, -160.0, 60.0, UNIX_TIME)
+    assert plan.duration > 60.0
+
+    # The RA axis targets the hour angle at arrival, and that move time is
+    # consistent with the reported duration
+    arrival_ha = 10.0 + SIDEREAL_RATE * plan.duration
+    assert plan.pier_side == PIER_EAST
+    assert plan.ra_axis == pytest.approx(arrival_ha - 90.0, abs=1e-4)
+    ra_time = planner.axis_time(plan.ra_move, slow)
+    dec_time = planner.axis_time(plan.dec_move, slow)
+    assert max(ra_time, dec_time) == pytest.approx(plan.duration, abs=1e-2)
+
+    ra_hours, dec = axis_to_equatorial(plan.ra_axis, plan.dec_axis, LONGITUDE, UNIX_TIME + plan.duration)
+    assert ra_hours == pytest.approx(ra_for_hour_angle(10.0), abs=1e-5)
+    assert dec == pytest.approx(30.0)
@@ -0,0 +1,84 @@
+"""Guide pulse rates and fractional guide steps"""
+import math
+
+import pytest
+
+from guiding import PulseGuider, GuideAccumulator, GUIDE_NORTH, GUIDE_WEST
+
+# DEC guide rate of the driver: half sidereal, in microsteps per second
+STEPS_PER_DEG = 200 * 16 * 100 / 360
+GUIDE_STEPS_PER_SEC = 0.5 * 360.0 / 86164.0 * STEPS_PER_DEG
+
+
+def run_pulses(accumulator, count, duration, rate, start=0.0, period=1.0):
+    """Apply pulses the way the tracking loop does; returns steps per pulse"""
+    steps = []
+    for k in range(count):
+        begin = start + k * period
+        emitted = accumulator.update(begin, rate, begin + duration)
+        # The loop wakes at the pulse end and sees no pulse any more
+        emitted += accumulator.update(begin + duration, 0.0, None)
+        steps.append(emitted)
+    return steps
+
+
+def test_short_pulses_accumulate():
+    accumulator = GuideAccumulator()
+    per_pulse = GUIDE_STEPS_PER_SEC * 0.020
+    needed = math.ceil(1.0 / per_pulse)
+
+    # A 20 ms pulse is a fraction of a microstep, so it does not step at once
+    steps = run_pulses(accumulator, needed, 0.020, GUIDE_STEPS_PER_SEC)
+    assert steps[:-1] == [0] * (needed - 1)
+    assert steps[-1] == 1
+    assert accumulator.phase == pytest.approx(needed * per_pulse - 1.0)
+
+
+def test_phase_carries_between_directions():
+    accumulator = GuideAccumulator()
+    run_pulses(accumulator, 5, 0.020, GUIDE_STEPS_PER_SEC)
+    owed = accumulator.phase
+    assert owed > 0
+
+    # South pulses pay back the fraction before stepping the other way
+    steps = run_pulses(accumulator, 5, 0.020, -GUIDE_STEPS_PER_SEC, start=10.0)
+    assert steps == [0] * 5
+    assert accumulator.phase == pytest.approx(0.0, abs=1e-9)
+
+
+def test_nothing_integrated_between_pulses():
+    accumulator = GuideAccumulator()
+    accumulator.update(0.0, 100.0, 0.005)
+    # Woken long after the pulse ended: only the 5 ms of the pulse count
+    assert accumulator.update(10.0, 0.0, None) == 0
+    assert accumulator.phase == pytest.approx(0.5)
+    assert accumulator.update(20.0, 0.0, None) == 0
+
+
+def test_next_step_time():
+    accumulator = GuideAccumulator()
+    accumulator.update(0.0, 10.0, 1.0)
+    assert accumulator.next_step_time(0.0) == pytest.approx(0.1)
+    accumulator.update(0.0, -10.0, 1.0)
+    assert accumulator.next_step_time(0.0) == pytest.approx(0.1)
+
+    # The step would fall after the pulse ends
+    accumulator.update(0.0, 10.0, 0.05)
+    assert accumulator.next_step_time(0.0) is None
+
+
+def test_rates_report_dec_end():
+    now = [100.0]
+    guider = PulseGuider(0.5, clock=lambda: now[0])
+    assert guider.rates(now[0]) == (0.0, 0.0, None, None)
+
+    guider.pulse(GUIDE_NORTH, 400)
+    guider.pulse(GUIDE_WEST, 100)
+    ra_offset, dec_offset, dec_end, pulse_end = guider.rates(100.05)
+    assert (ra_offset, dec_offset) == (0.5, 0.5)
+    assert dec_end == pytest.approx(100.4)
+    assert pulse_end == pytest.approx(100.1)
+
+    # After the DEC pulse ends there is no DEC end time to step towards
+    assert guider.rates(100.5) == (0.0, 0.0, None, None)
+    assert guider.latency_stats()['pulses'] == 2
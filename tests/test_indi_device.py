@@ -0,0 +1,67 @@
+"""INDI device protocol over in-memory streams"""
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from indi_device import IndiDevice, parse_number, IPS_BUSY, IPS_OK
+
+DEVICE = "TMC2209 Telescope"
+
+
+def serve(requests, handler=None):
+    """Run a device over the given client requests until the stream ends"""
+    output = io.BytesIO()
+    device = IndiDevice(DEVICE, io.BytesIO(requests.encode()), output)
+    device.define_number("EQUATORIAL_EOD_COORD", "Eq. Coordinates", "Main Control", "rw",
+                         [("RA", "RA", "%010.6m", 0, 24, 0, 0.0),
+                          ("DEC", "DEC", "%010.6m", -90, 90, 0, 0.0)], handler=handler)
+    device.define_switch("TELESCOPE_TRACK_STATE", "Tracking", "Main Control", "rw",
+                         [("TRACK_ON", "On", False), ("TRACK_OFF", "Off", True)])
+    device.start()
+    assert device.closed.wait(5)
+    return device, output
+
+
+def messages(output):
+    return list(ET.fromstring(b"<INDI>" + output.getvalue() + b"</INDI>"))
+
+
+def test_get_properties_defines_every_vector():
+    _, output = serve("<getProperties version='1.7'/>")
+    defs = messages(output)
+    assert [(m.tag, m.get("name")) for m in defs] == [
+        ("defNumberVector", "EQUATORIAL_EOD_COORD"),
+        ("defSwitchVector", "TELESCOPE_TRACK_STATE"),
+    ]
+    assert [(m.get("name"), m.text) for m in defs[1]] == [("TRACK_ON", "Off"), ("TRACK_OFF", "On")]
+
+
+def test_get_properties_for_another_device_is_ignored():
+    _, output = serve("<getProperties version='1.7' device='Other'/>")
+    assert messages(output) == []
+
+
+def test_new_number_reaches_handler():
+    received = []
+    serve(f"<newNumberVector device='{DEVICE}' name='EQUATORIAL_EOD_COORD'>"
+          "<oneNumber name='RA'>5:35:00</oneNumber>"
+          "<oneNumber name='DEC'>-5.39</oneNumber>"
+          "</newNumberVector>", received.append)
+    assert received == [{"RA": pytest.approx(5 + 35 / 60), "DEC": pytest.approx(-5.39)}]
+
+
+def test_set_number_reports_state():
+    device, output = serve("")
+    device.set_number("EQUATORIAL_EOD_COORD", {"RA": 5.5, "DEC": -5.25}, IPS_BUSY)
+    device.set_switch("TELESCOPE_TRACK_STATE", {"TRACK_ON": True, "TRACK_OFF": False}, IPS_OK)
+    coords, track = messages(output)
+    assert (coords.tag, coords.get("state")) == ("setNumberVector", IPS_BUSY)
+    assert {m.get("name"): float(m.text) for m in coords} == {"RA": 5.5, "DEC": -5.25}
+    assert (track.tag, track.get("state")) == ("setSwitchVector", IPS_OK)
+    assert [m.text for m in track] == ["On", "Off"]
+
+
+def test_parse_sexagesimal():
+    assert parse_number("-05:23:24") == pytest.approx(-(5 + 23 / 60 + 24 / 3600))
+    assert parse_number(" 12.5 ") == 12.5
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Speed and acceleration characterization for the TMC2209 telescope axes
+Ramps step rate and then acceleration per axis and microstep setting until a
+stall is detected, and writes the tuning profile loaded by indi_telescope.py
+"""
+import sys
+import time
+import argparse
+import logging
+
+from motion_profile import (AxisLimits, ramp_intervals, load_tuning_profile,
+                            save_tuning_profile, set_axis_limits, DEFAULT_PROFILE_PATH)
+
+logger = logging.getLogger('TelescopeDriver.characterize')
+
+# Motor pins (BCM) - keep in sync with indi_telescope.py
+AXIS_PINS = {
+    "RA": {"step": 21, "dir": 20, "enable": 16},
+    "DEC": {"step": 19, "dir": 26, "enable": 13},
+}
+UART_ADDRESSES = {"RA": 0, "DEC": 1}   # Set with the MS1/MS2 pins on each driver
+
+SAFETY_MARGIN = 0.8     # Fraction of the last stall-free value written to the profile
+RATE_FACTOR = 1.25      # Step rate increase per trial
+ACCEL_FACTOR = 1.5      # Acceleration increase per trial
+CRUISE_TIME = 0.5       # Seconds spent at full rate in each trial move
+SETTLE_TIME = 0.5       # Pause between the outward and return move
+MIN_RATE_GAIN = 1.05    # Faster trials must actually step at least this much faster
+TCOOLTHRS_MAX = 0xFFFFF # Keeps StallGuard (and the DIAG output) active at every step rate
+
+
+class AxisRig:
+    """STEP/DIR access to one axis, paced with the given sleep function and timed with clock"""
+
+    def __init__(self, name, gpio, sleep=time.sleep, clock=time.perf_counter):
+        self.name = name
+        self.gpio = gpio
+        self.sleep = sleep
+        self.clock = clock
+        self.pins = AXIS_PINS[name]
+        for pin in self.pins.values():
+            gpio.setup(pin, gpio.OUT)
+        gpio.output(self.pins["enable"], gpio.HIGH)
+
+    def enable(self, enabled=True):
+        # LOW enables the TMC2209
+        self.gpio.output(self.pins["enable"], self.gpio.LOW if enabled else self.gpio.HIGH)
+
+    def run(self, steps, direction, max_rate, accel):
+        """
+        Run a trapezoidal move of the given number of steps
+
+        Returns:
+            Step rate actually reached at the top of the ramp, in steps/s.
+            Sleep overhead makes it fall short of max_rate at high rates.
+        """
+        gpio = self.gpio
+        step_pin = self.pins["step"]
+        gpio.output(self.pins["dir"], gpio.HIGH if direction > 0 else gpio.LOW)
+
+        intervals = ramp_intervals(steps, max_rate, accel)
+        if not intervals:
+            return 0.0
+        # The steps at the peak rate (the cruise, or the top of a short move)
+        # are contiguous; time them from the first to the end of the last
+        peak = min(intervals)
+        first = intervals.index(peak)
+        last = first + intervals.count(peak)
+
+        started = elapsed = None
+        for i, interval in enumerate(intervals):
+            if i == first:
+                started = self.clock()
+            elif i == last:
+                elapsed = self.clock() - started
+            gpio.output(step_pin, gpio.HIGH)
+            gpio.output(step_pin, gpio.LOW)
+            self.sleep(interval)
+        if elapsed is None:
+            elapsed = self.clock() - started
+        return (last - first) / elapsed if elapsed > 0 else max_rate
+
+
+class SimulatedStallDetector:
+    """Reports stalls from a mount_simulator StepperModel"""
+
+    def __init__(self, model):
+        self.model = model
+        self._missed = 0
+
+    def begin(self):
+        self._missed = self.model.missed_steps
+
+    def stalled(self):
+        return self.model.missed_steps > self._missed
+
+
+class StallGuardDetector:
+    """
+    Reports stalls from the TMC2209 DIAG output
+
+    DIAG pulses high when StallGuard detects a stall. The driver is set up
+    over UART for it to trigger: StealthChop (StallGuard4 does not work in
+    SpreadCycle), TCOOLTHRS at its maximum so detection is active at every
+    step rate, and SGTHRS as the sensitivity (higher stalls sooner).
+    """
+
+    def __init__(self, gpio, diag_pin, driver, threshold):
+        self.gpio = gpio
+        self.diag_pin = diag_pin
+        driver.set_spreadcycle(False)
+        driver.set_coolstep_threshold(TCOOLTHRS_MAX)
+        driver.set_stallguard_threshold(threshold)
+        gpio.setup(diag_pin, gpio.IN, pull_up_down=gpio.PUD_DOWN)
+        gpio.add_event_detect(diag_pin, gpio.RISING)
+
+    def begin(self):
+        # Reading the flag clears any edge left over from the previous trial
+        self.gpio.event_detected(self.diag_pin)
+
+    def stalled(self):
+        return self.gpio.event_detected(self.diag_pin)
+
+
+class OperatorStallDetector:
+    """Asks the operator whether the axis returned to a reference mark"""
+
+    def __init__(self, name):
+        self.name = name
+        self._needs_alignment = True
+
+    def begin(self):
+        if self._needs_alignment:
+            input(f"Align the {self.name} axis with your reference mark, then press Enter...")
+            self._needs_alignment = False
+
+    def stalled(self):
+        answer = input(f"Is the {self.name} axis back exactly on the reference mark? [y/n]: ")
+        stalled = not answer.strip().lower().startswith('y')
+        self._needs_alignment = stalled
+        return stalled
+
+
+def run_trial(rig, detector, rate, accel):
+    """
+    Move out and back at the given rate and acceleration
+
+    Returns:
+        (True if no stall, slower of the two rates actually reached)
+    """
+    ramp_steps = rate ** 2 / (2.0 * accel)
+    steps = int(2 * ramp_steps + rate * CRUISE_TIME)
+
+    detector.begin()
+    achieved = rig.run(steps, 1, rate, accel)
+    rig.sleep(SETTLE_TIME)
+    achieved = min(achieved, rig.run(steps, -1, rate, accel))
+    rig.sleep(SETTLE_TIME)
+    ok = not detector.stalled()
+
+    logger.info(f"{rig.name}: {rate:8.0f} steps/s (reached {achieved:8.0f}), {accel:9.0f} steps/s² -> "
+                f"{'ok' if ok else 'STALL'}")
+    return ok, achieved
+
+
+def characterize_axis(rig, detector, start_rate, start_accel, rate_limit, accel_limit):
+    """
+    Find the highest reliable step rate, then the highest acceleration at that rate
+
+    Returns:
+        (AxisLimits scaled down by SAFETY_MARGIN, names of the limits whose
+        search reached its ceiling without a stall), or (None, []) if even
+        the starting rate stalls
+    """
+    at_ceiling = []
+    rig.enable()
+    try:
+        # Phase 1: raise the cruise rate at a conservative acceleration; the
+        # rate recorded is the one the steps were actually generated at
+        good_rate = None
+        good_command = None     # Requested rate that reached good_rate
+        rate = start_rate
+        while True:
+            if rate > rate_limit:
+                if good_rate is not None:
+                    logger.warning(f"{rig.name}: no stall up to the {rate_limit:.0f} steps/s search ceiling - "
+                                   f"the rate limit was not found, {good_rate:.0f} steps/s is only a lower bound")
+                    at_ceiling.append('max_rate')
+                break
+            ok, achieved = run_trial(rig, detector, rate, start_accel)
+            if not ok:
+                break
+            achieved = min(rate, achieved)
+            if good_rate is not None and achieved < good_rate * MIN_RATE_GAIN:
+                # Requesting more no longer steps faster
+                logger.warning(f"{rig.name}: {rate:.0f} steps/s requested but only {achieved:.0f} steps/s "
+                               f"generated - the host's step timing limits the rate, not the motor")
+                break
+            good_rate, good_command = achieved, rate
+            rate *= RATE_FACTOR
+        if good_rate is None:
+            logger.error(f"{rig.name}: stalled at the starting rate of {start_rate:.0f} steps/s")
+            return None, []
+
+        # Phase 2: raise the acceleration at that cruise rate
+        good_accel = start_accel
+        accel = start_accel * ACCEL_FACTOR
+        while accel <= accel_limit and run_trial(rig, detector, good_command, accel)[0]:
+            good_accel = accel
+            accel *= ACCEL_FACTOR
+        if accel > accel_limit:
+            logger.warning(f"{rig.name}: no stall up to the {accel_limit:.0f} steps/s² search ceiling - "
+                           f"the acceleration limit was not found, {good_accel:.0f} steps/s² is only a lower bound")
+            at_ceiling.append('max_accel')
+    finally:
+        rig.enable(False)
+
+    return AxisLimits(good_rate * SAFETY_MARGIN, good_accel * SAFETY_MARGIN), at_ceiling
+
+
+def main():
+    """Characterize the requested axes and microstep settings"""
+    parser = argparse.ArgumentParser(description="Characterize maximum axis speed and acceleration")
+    parser.add_argument('--axes', nargs='+', default=["RA", "DEC"], choices=sorted(AXIS_PINS))
+    parser.add_argument('--microsteps', nargs='+', type=int, default=[16],
+                        help="Microstep settings to characterize (changing them requires --uart)")
+    parser.add_argument('--detector', choices=["stallguard", "operator"], default="operator",
+                        help="How stalls are detected on real hardware")
+    parser.add_argument('--diag-pin', nargs=2, type=int, metavar=("RA_PIN", "DEC_PIN"),
+                        help="GPIO pins wired to the DIAG outputs (for --detector stallguard)")
+    parser.add_argument('--uart', help="UART device used to set microstepping and StallGuard, e.g. /dev/ttyS0")
+    parser.add_argument('--sgthrs', type=int, default=60,
+                        help="StallGuard threshold SGTHRS, 0-255 (higher detects stalls sooner)")
+    parser.add_argument('--sim', action='store_true', help="Characterize the simulated mount instead")
+    parser.add_argument('--start-rate', type=float, default=500, help="First trial rate at 1/16 microstepping")
+    parser.add_argument('--start-accel', type=float, default=5000, help="Conservative acceleration at 1/16")
+    parser.add_argument('--output', default=DEFAULT_PROFILE_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.detector == "stallguard" and not args.sim:
+        if not args.diag_pin:
+            logger.error("--detector stallguard requires --diag-pin RA_PIN DEC_PIN")
+            sys.exit(1)
+        if not args.uart:
+            logger.error("--detector stallguard requires --uart to configure StallGuard on the drivers")
+            sys.exit(1)
+
+    if args.sim:
+        from mount_simulator import SimulatedGPIO, StepperModel
+        logging.getLogger('TelescopeDriver.simulator').setLevel(logging.ERROR)
+        gpio = SimulatedGPIO()
+        sleep, clock = gpio.sleep, gpio.time
+    else:
+        try:
+            import RPi.GPIO as gpio
+        except ImportError:
+            logger.error("RPi.GPIO module not found. Install with: pip install RPi.GPIO (or use --sim)")
+            sys.exit(1)
+        sleep, clock = time.sleep, time.perf_counter
+
+    drivers = {}
+    if args.uart:
+        try:
+            from pytrinamic.connections import ConnectionManager
+            from pytrinamic.modules.tmc2209 import TMC2209
+        except ImportError:
+            logger.error("PyTrinamic module not found. Install with: pip install PyTrinamic")
+            sys.exit(1)
+        interface = ConnectionManager().connect_serial(args.uart, 115200)
+        drivers = {axis: TMC2209(interface, UART_ADDRESSES[axis]) for axis in args.axes}
+    elif len(args.microsteps) > 1 and not args.sim:
+        logger.error("Characterizing several microstep settings requires --uart")
+        sys.exit(1)
+
+    gpio.setmode(gpio.BCM)
+    profile = load_tuning_profile(args.output)
+    # One DIAG edge detector per axis - RPi.GPIO refuses a second one on a pin
+    stall_guards = {}
+
+    try:
+        for microsteps in args.microsteps:
+            # Rates scale with the microstep setting
+            scale = microsteps / 16
+            for axis in args.axes:
+                rig = AxisRig(axis, gpio, sleep, clock)
+                pins = AXIS_PINS[axis]
+
+                if args.sim:
+                    model = StepperModel(microsteps=microsteps)
+                    gpio.attach_axis(axis, model, pins["step"], pins["dir"], pins["enable"])
+                    detector = SimulatedStallDetector(model)
+                elif args.detector == "stallguard":
+                    if axis not in stall_guards:
+                        stall_guards[axis] = StallGuardDetector(gpio, args.diag_pin[0 if axis == "RA" else 1],
+                                                                drivers[axis], args.sgthrs)
+                    detector = stall_guards[axis]
+                else:
+                    detector = OperatorStallDetector(axis)
+
+                if axis in drivers:
+                    drivers[axis].set_microstep_resolution(microsteps)
+
+                print(f"\nCharacterizing {axis} at 1/{microsteps} microstepping")
+                limits, at_ceiling = characterize_axis(
+                    rig, detector,
+                    start_rate=args.start_rate * scale,
+                    start_accel=args.start_accel * scale,
+                    rate_limit=200000 * scale,
+                    accel_limit=2000000 * scale,
+                )
+                if limits is None:
+                    print(f"✗ {axis} could not be characterized at 1/{microsteps}")
+                    continue
+
+                if at_ceiling:
+                    # A limit that was never reached is not a measurement - most
+                    # likely the stall detector missed the stalls
+                    print(f"✗ {axis} at 1/{microsteps}: no stall up to the search ceiling "
+                          f"({', '.join(at_ceiling)}), check the stall detector - not written to the profile")
+                    continue
+
+                set_axis_limits(profile, axis, microsteps, limits)
+                print(f"✓ {axis} at 1/{microsteps}: "
+                      f"max rate {limits.max_rate:.0f} steps/s, max accel {limits.max_accel:.0f} steps/s²")
+
+        save_tuning_profile(profile, args.output)
+        print(f"\nTuning profile written to {args.output}")
+
+    except KeyboardInterrupt:
+        print("\nCharacterization interrupted, profile not written")
+
+    finally:
+        gpio.cleanup()
+        if drivers:
+            interface.close()
+
+
+if __name__ == "__main__":
+    main()
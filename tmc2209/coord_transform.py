@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Batched J2000 to mount step transforms for target lists and mosaics
+Converts arrays of J2000 RA/Dec into axis angles and step counts with NumPy:
+precession, local sidereal time and hour angle, pointing model terms, pier
+side selection and STEPS_PER_DEG, all as array operations
+
+Precession uses the IAU 1976 model; nutation and aberration (< 1 arcmin)
+are left to plate solving. Axis angles follow goto_planner.py.
+"""
+import sys
+import csv
+import time
+import argparse
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+from goto_planner import local_sidereal_time, MountLimits
+
+logger = logging.getLogger('TelescopeDriver.transform')
+
+J2000_JD = 2451545.0
+UNIX_EPOCH_JD = 2440587.5
+LST_RATE = 360.98564736629 / 86400.0   # Degrees of sidereal time per SI second
+
+
+def precession_matrix(jd):
+    """IAU 1976 precession rotation matrix from J2000 to the epoch jd"""
+    t = (jd - J2000_JD) / 36525.0
+    arcsec = np.pi / (180.0 * 3600.0)
+    zeta = (2306.2181 * t + 0.30188 * t ** 2 + 0.017998 * t ** 3) * arcsec
+    z = (2306.2181 * t + 1.09468 * t ** 2 + 0.018203 * t ** 3) * arcsec
+    theta = (2004.3109 * t - 0.42665 * t ** 2 - 0.041833 * t ** 3) * arcsec
+
+    cz, sz = np.cos(zeta), np.sin(zeta)
+    cZ, sZ = np.cos(z), np.sin(z)
+    ct, st = np.cos(theta), np.sin(theta)
+    return np.array([
+        [cz * ct * cZ - sz * sZ, -sz * ct * cZ - cz * sZ, -st * cZ],
+        [cz * ct * sZ + sz * cZ, -sz * ct * sZ + cz * cZ, -st * sZ],
+        [cz * st, -sz * st, ct],
+    ])
+
+
+class NightContext:
+    """Terms that stay fixed over one night: precession matrix and LST reference"""
+
+    def __init__(self, longitude, t0):
+        self.t0 = t0
+        self.lst0 = local_sidereal_time(longitude, t0)
+        self.precession = precession_matrix(t0 / 86400.0 + UNIX_EPOCH_JD)
+
+    def lst(self, unix_times):
+        """Local sidereal time in degrees for an array of unix times"""
+        return (self.lst0 + LST_RATE * (np.asarray(unix_times, dtype=float) - self.t0)) % 360.0
+
+
+@lru_cache(maxsize=4)
+def night_context(longitude, night):
+    """Cached NightContext for a night index (local noon to local noon)"""
+    # Reference the night at local midnight
+    t0 = (night + 1) * 86400.0 - longitude * 240.0
+    logger.debug(f"Computing night terms for night {night}")
+    return NightContext(longitude, t0)
+
+
+class PointingModel:
+    """
+    Pointing model terms in degrees (TPoint sign conventions)
+
+    ih / id: Index errors in hour angle and declination
+    ch: Collimation error between optical and DEC axes
+    npae: Non-perpendicularity of the RA and DEC axes
+    ma / me: Polar axis misalignment in azimuth and elevation
+    """
+
+    def __init__(self, ih=0.0, id=0.0, ch=0.0, npae=0.0, ma=0.0, me=0.0):
+        self.ih = ih
+        self.id = id
+        self.ch = ch
+        self.npae = npae
+        self.ma = ma
+        self.me = me
+
+    def apply(self, ha, dec):
+        """Return mount hour angle and declination (degrees) for true ones"""
+        h = np.radians(ha)
+        d = np.radians(dec)
+        tan_d = np.tan(d)
+        sec_d = 1.0 / np.cos(d)
+
+        dh = (-self.ih - self.ch * sec_d - self.npae * tan_d
+              + self.me * np.sin(h) * tan_d - self.ma * np.cos(h) * tan_d)
+        dd = -self.id + self.me * np.cos(h) + self.ma * np.sin(h)
+        return ha + dh, dec + dd
+
+
+def mosaic_panels(ra_hours, dec_deg, columns, rows, fov_width, fov_height, overlap=0.1):
+    """
+    J2000 centres of a columns x rows mosaic around a target
+
+    Args:
+        fov_width / fov_height: Field of view in degrees
+        overlap: Fraction of the field shared by neighbouring panels
+
+    Returns:
+        (ra_hours, dec_deg) arrays, row by row
+    """
+    step_x = fov_width * (1.0 - overlap)
+    step_y = fov_height * (1.0 - overlap)
+    offset_x = (np.arange(columns) - (columns - 1) / 2.0) * step_x
+    offset_y = (np.arange(rows) - (rows - 1) / 2.0) * step_y
+    # Panels sit on a grid in the tangent plane at the target (x east, y north)
+    xi, eta = np.meshgrid(np.tan(np.radians(offset_x)), np.tan(np.radians(offset_y)))
+    xi = xi.ravel()
+    eta = eta.ravel()
+
+    # Gnomonic de-projection, valid up to and across the pole
+    dec0 = np.radians(dec_deg)
+    denom = np.cos(dec0) - eta * np.sin(dec0)
+    dec = np.degrees(np.arctan2(np.sin(dec0) + eta * np.cos(dec0), np.hypot(xi, denom)))
+    ra = ra_hours + np.degrees(np.arctan2(xi, denom)) / 15.0
+    return ra % 24.0, dec
+
+
+class TransformResult:
+    """Per-target output arrays of TransformPipeline.transform"""
+
+    def __init__(self, ha, dec, ra_axis, dec_axis, pier_east, valid, ra_steps, dec_steps):
+        self.ha = ha                # Mount hour angle in degrees
+        self.dec = dec              # Mount declination (epoch of date) in degrees
+        self.ra_axis = ra_axis      # RA axis angle from home in degrees
+        self.dec_axis = dec_axis    # DEC axis angle from home in degrees
+        self.pier_east = pier_east  # True where the telescope sits east of the pier
+        self.valid = valid          # False where no pier side is within the limits
+        self.ra_steps = ra_steps    # RA axis position in microsteps
+        self.dec_steps = dec_steps  # DEC axis position in microsteps
+
+    def __len__(self):
+        return len(self.ra_steps)
+
+
+class TransformPipeline:
+    """
+    Vectorized J2000 RA/Dec to axis step conversion
+
+    The axis angles are nominal: each target gets the pier side
+    GotoPlanner.plan() picks when slewing from the home position, on the
+    home cable turn. They are not GOTO targets. A slew from wherever the
+    mount is may pick the other pier side or a cable-wrap alternative, and
+    compensates the sky motion during the slew; driver.goto() plans that.
+
+    Args:
+        latitude / longitude: Site position in degrees (longitude east-positive)
+        steps_per_deg: Microsteps per axis degree
+        model: PointingModel (defaults to a perfectly aligned mount)
+        limits: goto_planner.MountLimits used to pick the pier side
+    """
+
+    def __init__(self, latitude, longitude, steps_per_deg, model=None, limits=None):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.steps_per_deg = steps_per_deg
+        self.model = model or PointingModel()
+        self.limits = limits or MountLimits()
+
+    def night_index(self, unix_time):
+        """Index of the night (local noon to local noon) containing unix_time"""
+        return int((unix_time + self.longitude * 240.0 - 43200.0) // 86400.0)
+
+    def night(self, unix_time):
+        """Cached per-night terms for the night containing unix_time"""
+        return night_context(self.longitude, self.night_index(unix_time))
+
+    def transform(self, ra_hours, dec_deg, unix_times):
+        """
+        Transform arrays of J2000 targets to mount axis angles and steps
+
+        Args:
+            ra_hours / dec_deg: J2000 coordinates (array-like, same length)
+            unix_times: Slew time per target, or one time for all targets;
+                all times must fall within the same night
+
+        Returns:
+            TransformResult
+
+        Raises:
+            ValueError: If the times span more than one night
+        """
+        ra = np.radians(np.asarray(ra_hours, dtype=float) * 15.0)
+        dec = np.radians(np.asarray(dec_deg, dtype=float))
+        unix_times = np.asarray(unix_times, dtype=float)
+        first, last = float(unix_times.min()), float(unix_times.max())
+        # The precession and sidereal time terms are computed once per night
+        if self.night_index(first) != self.night_index(last):
+            raise ValueError("Slew times span more than one night; transform each night separately")
+        night = self.night(first)
+
+        # Precess J2000 unit vectors to the epoch of the night
+        cos_dec = np.cos(dec)
+        vectors = np.stack((cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)))
+        x, y, z = night.precession @ vectors
+        ra_date = np.degrees(np.arctan2(y, x))
+        dec_date = np.degrees(np.arcsin(np.clip(z, -1.0, 1.0)))
+
+        # Hour angle in [-180, 180) at each slew time, then the pointing model
+        ha = (night.lst(unix_times) - ra_date + 180.0) % 360.0 - 180.0
+        ha, dec_mount = self.model.apply(ha, dec_date)
+
+        ra_axis, dec_axis, pier_east, valid = self._axis_angles(ha, dec_mount)
+        valid &= self._altitude(ha, dec_date) >= self.limits.min_altitude
+
+        return TransformResult(
+            ha, dec_mount, ra_axis, dec_axis, pier_east, valid,
+            np.rint(ra_axis * self.steps_per_deg).astype(np.int64),
+            np.rint(dec_axis * self.steps_per_deg).astype(np.int64),
+        )
+
+    def _axis_angles(self, ha, dec):
+        """Pick a pier side per target (as planned from home) and return its axis angles"""
+        polar_distance = 90.0 - dec
+        east = (ha - 90.0, polar_distance)
+        west = (ha + 90.0, -polar_distance)
+        east_ok = self._allowed(*east)
+        west_ok = self._allowed(*west)
+
+        # Pier east for targets west of the meridian, unless only west fits
+        pier_east = np.where(ha >= 0, east_ok | ~west_ok, east_ok & ~west_ok)
+        ra_axis = np.where(pier_east, east[0], west[0])
+        dec_axis = np.where(pier_east, east[1], west[1])
+        return ra_axis, dec_axis, pier_east, east_ok | west_ok
+
+    def _allowed(self, ra_axis, dec_axis):
+        """Vectorized MountLimits.allows"""
+        limits = self.limits
+        wrapped = (ra_axis + 180.0) % 360.0 - 180.0
+        return ((ra_axis >= limits.ra_axis_min) & (ra_axis <= limits.ra_axis_max)
+                & (dec_axis >= limits.dec_axis_min) & (dec_axis <= limits.dec_axis_max)
+                & (np.abs(wrapped) <= 90.0 + limits.meridian_limit))
+
+    def _altitude(self, ha, dec):
+        """Altitude in degrees for arrays of hour angle and declination"""
+        lat = np.radians(self.latitude)
+        h = np.radians(ha)
+        d = np.radians(dec)
+        sin_alt = np.sin(lat) * np.sin(d) + np.cos(lat) * np.cos(d) * np.cos(h)
+        return np.degrees(np.arcsin(np.clip(sin_alt, -1.0, 1.0)))
+
+
+def main():
+    """Transform a CSV target list (name, ra_hours, dec_deg) into step targets"""
+    parser = argparse.ArgumentParser(description="Convert a J2000 target list to axis step counts")
+    parser.add_argument('targets', help="CSV file with name, RA (hours), Dec (degrees) per line")
+    parser.add_argument('--lat', type=float, required=True, help="Site latitude in degrees")
+    parser.add_argument('--lon', type=float, required=True, help="Site longitude in degrees (east positive)")
+    parser.add_argument('--steps-per-deg', type=float, default=200 * 16 * 100 / 360,
+                        help="Microsteps per axis degree (default matches indi_telescope.py)")
+    parser.add_argument('--interval', type=float, default=0.0,
+                        help="Seconds between consecutive slews (default: all at once, now)")
+    args = parser.parse_args()
+
+    with open(args.targets, newline='') as f:
+        rows = [row for row in csv.reader(f) if row and not row[0].startswith('#')]
+    if not rows:
+        print("No targets found")
+        sys.exit(1)
+
+    names = [row[0] for row in rows]
+    ra_hours = [float(row[1]) for row in rows]
+    dec_deg = [float(row[2]) for row in rows]
+    times = time.time() + args.interval * np.arange(len(rows))
+
+    pipeline = TransformPipeline(args.lat, args.lon, args.steps_per_deg)
+    start = time.perf_counter()
+    result = pipeline.transform(ra_hours, dec_deg, times)
+    elapsed = time.perf_counter() - start
+
+    for i, name in enumerate(names):
+        if not result.valid[i]:
+            print(f"✗ {name:20s} outside mount limits")
+            continue
+        side = "EAST" if result.pier_east[i] else "WEST"
+        print(f"✓ {name:20s} pier {side}  RA {result.ra_steps[i]:10d}  DEC {result.dec_steps[i]:10d} steps")
+
+    print(f"\nTransformed {len(rows)} targets in {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Quadrature encoder support for closed-loop position correction
+Counts encoder edges through a GPIO edge backend and compares the measured
+axis position with the commanded step count to detect and correct lost steps
+"""
+import logging
+
+logger = logging.getLogger('TelescopeDriver.encoders')
+
+# Count change for (previous AB state << 2 | new AB state); None marks an
+# impossible jump where both channels changed, i.e. an edge was missed
+_TRANSITIONS = (
+    0, 1, -1, None,
+    -1, 0, None, 1,
+    1, None, 0, -1,
+    None, -1, 1, 0,
+)
+
+
+class QuadratureDecoder:
+    """4x quadrature decoder fed with the A/B levels after every edge"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0     # Edges missed because the backend was too slow
+        self._state = None
+
+    def update(self, a, b):
+        """Feed the current A/B levels"""
+        state = (1 if a else 0) << 1 | (1 if b else 0)
+        if self._state is not None:
+            delta = _TRANSITIONS[self._state << 2 | state]
+            if delta is None:
+                self.errors += 1
+            else:
+                self.count += delta
+        self._state = state
+
+
+class GpioEdgeBackend:
+    """Encoder edges through RPi.GPIO interrupts (a few kHz at most)"""
+
+    def __init__(self, gpio, pin_a, pin_b):
+        self.gpio = gpio
+        self.pin_a = pin_a
+        self.pin_b = pin_b
+        self.decoder = None
+
+    def start(self, decoder):
+        gpio = self.gpio
+        self.decoder = decoder
+        for pin in (self.pin_a, self.pin_b):
+            gpio.setup(pin, gpio.IN, pull_up_down=gpio.PUD_UP)
+        decoder.update(gpio.input(self.pin_a), gpio.input(self.pin_b))
+        for pin in (self.pin_a, self.pin_b):
+            gpio.add_event_detect(pin, gpio.BOTH, callback=self._edge)
+
+    def _edge(self, channel):
+        self.decoder.update(self.gpio.input(self.pin_a), self.gpio.input(self.pin_b))
+
+    def poll(self):
+        """Edges arrive through interrupts; nothing to do"""
+
+    def stop(self):
+        for pin in (self.pin_a, self.pin_b):
+            self.gpio.remove_event_detect(pin)
+
+
+class PigpioEdgeBackend:
+    """
+    Encoder edges through the pigpio daemon (DMA sampled, 100+ kHz)
+
+    Requires the pigpiod daemon: sudo pigpiod
+    """
+
+    def __init__(self, pin_a, pin_b):
+        import pigpio
+        self.pigpio = pigpio
+        self.pi = pigpio.pi()
+        if not self.pi.connected:
+            raise RuntimeError("Cannot connect to pigpiod - start it with: sudo pigpiod")
+        self.pin_a = pin_a
+        self.pin_b = pin_b
+        self.levels = [0, 0]
+        self._callbacks = []
+
+    def start(self, decoder):
+        pi = self.pigpio
+        for pin in (self.pin_a, self.pin_b):
+            self.pi.set_mode(pin, pi.INPUT)
+            self.pi.set_pull_up_down(pin, pi.PUD_UP)
+        self.levels = [self.pi.read(self.pin_a), self.pi.read(self.pin_b)]
+        decoder.update(*self.levels)
+
+        def edge(pin, level, tick):
+            # Level comes with the edge, so no pins are read back
+            self.levels[0 if pin == self.pin_a else 1] = level
+            decoder.update(*self.levels)
+
+        self._callbacks = [self.pi.callback(pin, pi.EITHER_EDGE, edge) for pin in (self.pin_a, self.pin_b)]
+
+    def poll(self):
+        """Edges arrive through callbacks; nothing to do"""
+
+    def stop(self):
+        for callback in self._callbacks:
+            callback.cancel()
+        self.pi.stop()
+
+
+class AxisEncoder:
+    """
+    Compares an axis encoder with the commanded step position
+
+    Args:
+        name: Axis name for log messages
+        backend: Edge backend with start(decoder), poll() and stop()
+        counts_per_rev: Quadrature counts per axis revolution
+        steps_per_deg: Motor microsteps per axis degree
+        tolerance_steps: Error (in microsteps) tolerated before correcting
+    """
+
+    def __init__(self, name, backend, counts_per_rev, steps_per_deg, tolerance_steps=16):
+        self.name = name
+        self.backend = backend
+        self.decoder = QuadratureDecoder()
+        self.steps_per_count = steps_per_deg * 360.0 / counts_per_rev
+        # An error below one encoder count cannot be measured
+        self.tolerance_steps = max(tolerance_steps, self.steps_per_count)
+        self.lost_steps = 0         # Total microsteps found missing (or gained)
+        self.corrections = 0        # Number of times a correction was needed
+        self.last_error = 0.0
+        backend.start(self.decoder)
+
+    def position_steps(self):
+        """Measured axis position in microsteps"""
+        self.backend.poll()
+        return self.decoder.count * self.steps_per_count
+
+    def check(self, commanded_steps):
+        """
+        Compare the encoder with the commanded position
+
+        Returns:
+            Signed number of microsteps to move to correct the error
+            (0 if within tolerance)
+        """
+        error = self.position_steps() - commanded_steps
+        self.last_error = error
+        if abs(error) <= self.tolerance_steps:
+            return 0
+
+        correction = -round(error)
+        self.lost_steps += abs(correction)
+        self.corrections += 1
+        logger.warning(f"{self.name} encoder disagrees with commanded position by "
+                       f"{error:+.0f} microsteps - lost steps detected, correcting")
+        return correction
+
+    def status(self):
+        """Encoder statistics for reporting"""
+        return {
+            'error_steps': self.last_error,
+            'lost_steps': self.lost_steps,
+            'corrections': self.corrections,
+            'decoder_errors': self.decoder.errors,
+        }
+
+    def stop(self):
+        self.backend.stop()
+
+
+def measure_backlash(encoder, step, max_steps):
+    """
+    Measure the gear lash between motor and encoder in microsteps
+
+    Steps forward until the encoder count changes, which leaves the lash
+    closed and the axis just past a count boundary. Then steps back one
+    microstep at a time until the count drops back across that boundary.
+    The axis sits only the rotor's overshoot past the boundary, so the
+    step that closes the lash already carries it back across: the reverse
+    steps are the lash, to within a microstep.
+
+    Args:
+        encoder: AxisEncoder on the axis
+        step: Function emitting one motor microstep in a direction (+1/-1)
+        max_steps: Steps to try in each direction before giving up
+
+    Returns:
+        Backlash in microsteps, or None if the encoder never moved
+    """
+    decoder = encoder.decoder
+
+    def step_until(direction, changed):
+        for taken in range(1, max_steps + 1):
+            step(direction)
+            encoder.position_steps()
+            if changed(decoder.count):
+                return taken
+        return None
+
+    start = decoder.count
+    if step_until(1, lambda count: count > start) is None:
+        logger.error(f"{encoder.name} encoder did not move - cannot measure backlash")
+        return None
+
+    boundary = decoder.count
+    reverse = step_until(-1, lambda count: count < boundary)
+    if reverse is None:
+        logger.error(f"{encoder.name} encoder did not move back within {max_steps} steps")
+        return None
+
+    backlash = reverse
+    logger.info(f"{encoder.name} backlash measured at {backlash} microsteps")
+    return backlash
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Time-optimal GOTO planning for a German equatorial mount
+Works out both axis moves for a target RA/Dec from the current axis positions
+and local sidereal time, choosing the fastest solution (including meridian
+flips) within the mount's mechanical limits
+
+Axis angles (northern hemisphere):
+    RA axis  - degrees from counterweight-down, increasing with the tracking
+               direction (the driver's ra_position plus tracking steps)
+    DEC axis - degrees from the pole (the driver's dec_position)
+    Home (0, 0) is the usual park position: counterweight down, pointing at the pole
+"""
+import math
+import time
+import argparse
+
+from motion_profile import AxisLimits, move_duration
+
+SIDEREAL_RATE = 360.0 / 86164.0905  # Sky motion in degrees per second
+
+PIER_EAST = "EAST"   # Telescope east of the pier, looking west (hour angle >= 0)
+PIER_WEST = "WEST"   # Telescope west of the pier, looking east (hour angle < 0)
+
+
+def local_sidereal_time(longitude_deg, unix_time=None):
+    """Local sidereal time in degrees for an east-positive longitude"""
+    if unix_time is None:
+        unix_time = time.time()
+    days = unix_time / 86400.0 + 2440587.5 - 2451545.0  # Days since J2000.0
+    gmst = 280.46061837 + 360.98564736629 * days
+    return (gmst + longitude_deg) % 360.0
+
+
+def wrap180(angle):
+    """Wrap an angle in degrees into [-180, 180)"""
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+def axis_to_equatorial(ra_axis, dec_axis, longitude_deg, unix_time=None):
+    """
+    RA (hours) and declination (degrees) the mount points at, from its axis angles
+
+    Inverse of GotoPlanner.candidates: the sign of the DEC axis angle gives
+    the pier side.
+    """
+    if dec_axis >= 0:   # PIER_EAST
+        hour_angle = ra_axis + 90.0
+        dec = 90.0 - dec_axis
+    else:               # PIER_WEST
+        hour_angle = ra_axis - 90.0
+        dec = 90.0 + dec_axis
+    ra_hours = (local_sidereal_time(longitude_deg, unix_time) - hour_angle) / 15.0 % 24.0
+    return ra_hours, dec
+
+
+class MountLimits:
+    """
+    Mechanical limits of the mount
+
+    Args:
+        ra_axis_min / ra_axis_max: RA axis travel allowed by cables, in degrees
+        dec_axis_min / dec_axis_max: DEC axis travel in degrees
+        meridian_limit: Degrees the counterweight may rise above horizontal
+            (how far past the meridian the mount may track before a flip)
+        min_altitude: Lowest target altitude in degrees
+    """
+
+    def __init__(self, ra_axis_min=-180.0, ra_axis_max=180.0, dec_axis_min=-180.0,
+                 dec_axis_max=180.0, meridian_limit=15.0, min_altitude=0.0):
+        self.ra_axis_min = ra_axis_min
+        self.ra_axis_max = ra_axis_max
+        self.dec_axis_min = dec_axis_min
+        self.dec_axis_max = dec_axis_max
+        self.meridian_limit = meridian_limit
+        self.min_altitude = min_altitude
+
+    def allows(self, ra_axis, dec_axis):
+        """True if the axis angles are within cable, DEC and counterweight limits"""
+        return (self.ra_axis_min <= ra_axis <= self.ra_axis_max
+                and self.dec_axis_min <= dec_axis <= self.dec_axis_max
+                and abs(wrap180(ra_axis)) <= 90.0 + self.meridian_limit)
+
+    def allows_sweep(self, ra_axis_from, ra_axis_to):
+        """
+        True if the counterweight stays within its limit all along an RA axis move
+
+        A move that starts past the limit (tracking can take it there) may
+        head back towards it, but not raise the counterweight any further.
+        """
+        limit = max(90.0 + self.meridian_limit, abs(wrap180(ra_axis_from)))
+        low, high = sorted((ra_axis_from, ra_axis_to))
+        # The counterweight is above the limit on (limit, 360 - limit) + 360k;
+        # find the first such interval that ends above low
+        k = math.floor((low - (360.0 - limit)) / 360.0) + 1
+        return not limit + 360.0 * k < high
+
+
+class GotoPlan:
+    """Axis targets and moves for one GOTO"""
+
+    def __init__(self, ra_axis, dec_axis, ra_move, dec_move, pier_side, flip, duration, time_to_limit):
+        self.ra_axis = ra_axis              # Target RA axis angle in degrees
+        self.dec_axis = dec_axis            # Target DEC axis angle in degrees
+        self.ra_move = ra_move              # Signed RA axis move in degrees
+        self.dec_move = dec_move            # Signed DEC axis move in degrees
+        self.pier_side = pier_side
+        self.flip = flip                    # True if the move changes pier side
+        self.duration = duration            # Seconds until both axes arrive
+        self.time_to_limit = time_to_limit  # Seconds of tracking before the meridian limit
+
+    def __repr__(self):
+        return (f"GotoPlan(pier_side={self.pier_side}, flip={self.flip}, "
+                f"ra_move={self.ra_move:.3f}, dec_move={self.dec_move:.3f}, "
+                f"duration={self.duration:.2f}s)")
+
+
+class GotoPlanner:
+    """
+    Plans minimum-time GOTOs for a German equatorial mount
+
+    Args:
+        steps_per_deg: Microsteps per axis degree
+        ra_limits / dec_limits: motion_profile.AxisLimits of each axis (steps/s, steps/s²)
+        latitude / longitude: Site position in degrees (longitude east-positive)
+        limits: MountLimits
+    """
+
+    def __init__(self, steps_per_deg, ra_limits, dec_limits, latitude, longitude, limits=None):
+        self.steps_per_deg = steps_per_deg
+        self.ra_limits = ra_limits
+        self.dec_limits = dec_limits
+        self.latitude = latitude
+        self.longitude = longitude
+        self.limits = limits or MountLimits()
+
+    @staticmethod
+    def pier_side(dec_axis):
+        """Pier side implied by a DEC axis angle"""
+        return PIER_EAST if dec_axis >= 0 else PIER_WEST
+
+    def altitude(self, hour_angle, dec):
+        """Altitude in degrees of a target at the given hour angle and declination"""
+        lat, ha, dec = map(math.radians, (self.latitude, hour_angle, dec))
+        sin_alt = math.sin(lat) * math.sin(dec) + math.cos(lat) * math.cos(dec) * math.cos(ha)
+        return math.degrees(math.asin(max(-1.0, min(1.0, sin_alt))))
+
+    def axis_time(self, degrees, limits):
+        """Seconds to move one axis by the given angle"""
+        return move_duration(round(abs(degrees) * self.steps_per_deg), limits.max_rate, limits.max_accel)
+
+    def candidates(self, hour_angle, dec, ra_axis_now):
+        """All (ra_axis, dec_axis, pier_side) pointing at the target within limits"""
+        hour_angle = wrap180(hour_angle)
+        polar_distance = 90.0 - dec
+
+        if abs(polar_distance) < 1e-9:
+            # At the pole the RA axis angle is irrelevant - leave it where it is
+            solutions = [(ra_axis_now, 0.0)]
+        else:
+            solutions = [(hour_angle - 90.0, polar_distance),    # PIER_EAST
+                         (hour_angle + 90.0, -polar_distance)]   # PIER_WEST
+
+        for ra_axis, dec_axis in solutions:
+            # The same physical angle may be reachable by turning either way
+            for turns in (-360.0, 0.0, 360.0):
+                candidate = ra_axis + turns
+                if self.limits.allows(candidate, dec_axis):
+                    yield candidate, dec_axis, self.pier_side(dec_axis)
+
+    def plan(self, ra_hours, dec, ra_axis_now, dec_axis_now, unix_time=None):
+        """
+        Plan the fastest GOTO to a target
+
+        The hour angle is evaluated at the arrival time, so the sky motion
+        during the slew itself is compensated.
+
+        Args:
+            ra_hours / dec: Target coordinates (epoch of date)
+            ra_axis_now / dec_axis_now: Current axis angles in degrees
+            unix_time: Planning time (defaults to now)
+
+        Returns:
+            GotoPlan
+
+        Raises:
+            ValueError: If the target is below min_altitude or outside the limits
+        """
+        if not -90.0 <= dec <= 90.0:
+            raise ValueError(f"Declination {dec} out of range")
+        if unix_time is None:
+            unix_time = time.time()
+        lst = local_sidereal_time(self.longitude, unix_time)
+        hour_angle_now = lst - ra_hours * 15.0
+        # At the pole the RA axis stays put, so sky motion needs no compensation
+        drift_rate = 0.0 if abs(90.0 - dec) < 1e-9 else SIDEREAL_RATE
+
+        best = None
+        for candidate in self.candidates(hour_angle_now, dec, ra_axis_now):
+            # Re-solve for the hour angle at arrival until the duration settles
+            duration = 0.0
+            for _ in range(10):
+                ra_axis = candidate[0] + drift_rate * duration
+                ra_time = self.axis_time(ra_axis - ra_axis_now, self.ra_limits)
+                dec_time = self.axis_time(candidate[1] - dec_axis_now, self.dec_limits)
+                new_duration = max(ra_time, dec_time)
+                if abs(new_duration - duration) < 1e-3:
+                    break
+                duration = new_duration
+
+            # Checking the end point alone would let a cable-wrap alternative
+            # swing the counterweight up and over on the way
+            if not (self.limits.allows(ra_axis, candidate[1])
+                    and self.limits.allows_sweep(ra_axis_now, ra_axis)):
+                continue
+            if best is None or duration < best[0]:
+                best = (duration, ra_axis, candidate[1], candidate[2])
+
+        if best is None:
+            raise ValueError(f"Target RA {ra_hours:.4f}h Dec {dec:.4f}° is outside the mount limits")
+
+        duration, ra_axis, dec_axis, side = best
+        arrival_ha = hour_angle_now + SIDEREAL_RATE * duration
+        if self.altitude(arrival_ha, dec) < self.limits.min_altitude:
+            raise ValueError(f"Target RA {ra_hours:.4f}h Dec {dec:.4f}° is below the horizon limit")
+
+        # Tracking raises the RA axis angle until the counterweight limit
+        limit_angle = 90.0 + self.limits.meridian_limit
+        time_to_limit = (limit_angle - wrap180(ra_axis)) / SIDEREAL_RATE
+
+        # Pointing at the pole (DEC axis at 0) belongs to neither pier side
+        flip = abs(dec_axis_now) > 1e-9 and side != self.pier_side(dec_axis_now)
+
+        return GotoPlan(
+            ra_axis, dec_axis,
+            ra_axis - ra_axis_now, dec_axis - dec_axis_now,
+            side, flip, duration, time_to_limit,
+        )
+
+
+def main():
+    """Print the GOTO plan for a target from the home position"""
+    parser = argparse.ArgumentParser(description="Plan a GOTO from the current axis angles")
+    parser.add_argument('ra', type=float, help="Target RA in hours")
+    parser.add_argument('dec', type=float, help="Target Dec in degrees")
+    parser.add_argument('--lat', type=float, required=True, help="Site latitude in degrees")
+    parser.add_argument('--lon', type=float, required=True, help="Site longitude in degrees (east positive)")
+    parser.add_argument('--ra-axis', type=float, default=0.0, help="Current RA axis angle (0 = home)")
+    parser.add_argument('--dec-axis', type=float, default=0.0, help="Current DEC axis angle (0 = home)")
+    parser.add_argument('--rate', type=float, default=2500, help="Max slew rate in steps/s")
+    parser.add_argument('--accel', type=float, default=None, help="Slew acceleration in steps/s²")
+    args = parser.parse_args()
+
+    limits = AxisLimits(args.rate, args.accel)
+    steps_per_deg = 200 * 16 * 100 / 360   # Matches indi_telescope.py
+    planner = GotoPlanner(steps_per_deg, limits, limits, args.lat, args.lon)
+
+    plan = planner.plan(args.ra, args.dec, args.ra_axis, args.dec_axis)
+    print(f"Pier side:      {plan.pier_side}{' (meridian flip)' if plan.flip else ''}")
+    print(f"RA axis move:   {plan.ra_move:+.4f}° -> {plan.ra_axis:.4f}°")
+    print(f"DEC axis move:  {plan.dec_move:+.4f}° -> {plan.dec_axis:.4f}°")
+    print(f"Time to target: {plan.duration:.2f} s")
+    print(f"Tracking time before meridian limit: {plan.time_to_limit / 3600:.2f} h")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Pulse guiding support for the TMC2209 telescope driver
+Guide pulses are applied as temporary rate offsets inside the tracking loop
+(INDI TELESCOPE_TIMED_GUIDE_NS / TELESCOPE_TIMED_GUIDE_WE semantics)
+"""
+import math
+import time
+import threading
+
+# Pulse directions as used by INDI
+GUIDE_NORTH = 'N'
+GUIDE_SOUTH = 'S'
+GUIDE_EAST = 'E'
+GUIDE_WEST = 'W'
+
+
+class PulseGuider:
+    """
+    Holds the active RA/DEC guide pulses and measures their latency
+
+    pulse() is called from the INDI thread and only replaces an immutable
+    tuple, then wakes the tracking loop. The tracking loop calls rates() to
+    get the current rate offsets; the first time it sees a new pulse the
+    delay since the request is recorded as the guide latency.
+
+    Args:
+        guide_rate: Guide speed as a fraction of sidereal rate
+        clock: Monotonic time source in seconds
+    """
+
+    def __init__(self, guide_rate=0.5, clock=time.monotonic):
+        if not 0 < guide_rate < 1:
+            raise ValueError("guide_rate must be between 0 and 1 (fraction of sidereal)")
+        self.guide_rate = guide_rate
+        self.clock = clock
+        self.wake = threading.Event()
+
+        # Active pulses as (requested_at, ends_at, signed rate offset)
+        self._ra_pulse = None
+        self._dec_pulse = None
+        self._seen = {'ra': None, 'dec': None}   # requested_at of the last pulse applied
+
+        # Latency statistics in seconds
+        self.pulse_count = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._total_latency = 0.0
+
+    def pulse(self, direction, duration_ms):
+        """Start a guide pulse; a new pulse on the same axis replaces the old one"""
+        now = self.clock()
+        if direction in (GUIDE_WEST, GUIDE_EAST):
+            # West speeds up tracking, east slows it down
+            offset = self.guide_rate if direction == GUIDE_WEST else -self.guide_rate
+            self._ra_pulse = (now, now + duration_ms / 1000.0, offset)
+        elif direction in (GUIDE_NORTH, GUIDE_SOUTH):
+            offset = self.guide_rate if direction == GUIDE_NORTH else -self.guide_rate
+            self._dec_pulse = (now, now + duration_ms / 1000.0, offset)
+        else:
+            raise ValueError(f"Unknown guide direction: {direction}")
+        self.wake.set()
+
+    def rates(self, now):
+        """
+        Current rate offsets as fractions of sidereal rate
+
+        Returns:
+            (ra_offset, dec_offset, dec_end, pulse_end) - the end of the DEC
+            pulse, and the earliest time either pulse ends (None when no
+            pulse is active), all read from the same pulses as the offsets
+        """
+        ra_offset, ra_end = self._active('ra', self._ra_pulse, now)
+        dec_offset, dec_end = self._active('dec', self._dec_pulse, now)
+        ends = [t for t in (ra_end, dec_end) if t is not None]
+        return ra_offset, dec_offset, dec_end, min(ends) if ends else None
+
+    def latency_stats(self):
+        """Guide command latency in milliseconds"""
+        mean = self._total_latency / self.pulse_count if self.pulse_count else 0.0
+        return {
+            'pulses': self.pulse_count,
+            'last_ms': self.last_latency * 1000,
+            'mean_ms': mean * 1000,
+            'max_ms': self.max_latency * 1000,
+        }
+
+    def _active(self, axis, pulse, now):
+        """Offset and end time of a pulse, recording its latency on first sight"""
+        if pulse is None or now >= pulse[1]:
+            return 0.0, None
+
+        requested_at = pulse[0]
+        if self._seen[axis] != requested_at:
+            # Only the tracking thread calls this, so no lock is needed
+            self._seen[axis] = requested_at
+            latency = now - requested_at
+            self.pulse_count += 1
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self._total_latency += latency
+        return pulse[2], pulse[1]
+
+
+class GuideAccumulator:
+    """
+    Fractional guide steps of one axis, carried over between pulses
+
+    A guide pulse usually moves the axis by a fraction of a microstep.
+    update() integrates the rate of the previous call up to now (or up to
+    the end of its pulse) and returns only the whole steps owed, so short
+    pulses add up instead of each one stepping at once. Timing restarts at
+    every call, so nothing is integrated while no pulse is active.
+    """
+
+    def __init__(self):
+        self.phase = 0.0        # Fractional steps owed, signed
+        self._rate = 0.0        # Steps/s being integrated
+        self._since = None      # Time integrated up to
+        self._end = None        # End of the pulse behind _rate
+
+    def update(self, now, rate, end):
+        """
+        Integrate up to now, then continue at rate (steps/s) until end
+
+        Returns:
+            Signed number of whole steps to emit now
+        """
+        if self._rate:
+            self.phase += self._rate * (min(now, self._end) - self._since)
+        self._rate = rate
+        self._since = now
+        self._end = end
+
+        steps = int(self.phase)   # Whole steps, rounded towards zero
+        self.phase -= steps
+        return steps
+
+    def next_step_time(self, now):
+        """When the next whole step falls due (None if not during this pulse)"""
+        if not self._rate:
+            return None
+        due = now + (math.copysign(1.0, self._rate) - self.phase) / self._rate
+        return due if due < self._end else None
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Device side of the INDI protocol for the TMC2209 telescope driver
+When indiserver starts the driver, it talks to it in INDI XML over the
+driver's stdin and stdout. IndiDevice defines the device's properties, sends
+their updates to indiserver, and hands client requests to handlers.
+"""
+import os
+import sys
+import stat
+import time
+import threading
+import logging
+import xml.etree.ElementTree as ET
+
+logger = logging.getLogger('TelescopeDriver.device')
+
+# Property states
+IPS_IDLE = "Idle"
+IPS_OK = "Ok"
+IPS_BUSY = "Busy"
+IPS_ALERT = "Alert"
+
+
+def running_under_indiserver():
+    """
+    True when the driver should serve INDI on stdin/stdout
+
+    indiserver connects its drivers through pipes (or socket pairs); a
+    terminal, or /dev/null under a service manager, means the script was
+    started by hand. TELESCOPE_INDI=device or =client overrides the guess.
+    """
+    mode = os.environ.get("TELESCOPE_INDI")
+    if mode in ("device", "client"):
+        return mode == "device"
+    try:
+        modes = [os.fstat(fd).st_mode for fd in (0, 1)]
+    except OSError:
+        return False
+    return all(stat.S_ISFIFO(m) or stat.S_ISSOCK(m) for m in modes)
+
+
+def parse_number(text):
+    """Parse an INDI number, either decimal or sexagesimal ("-5:23:24")"""
+    text = text.strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = text.replace(" ", ":").split(":")
+    negative = parts[0].startswith("-")
+    value = 0.0
+    for i, part in enumerate(parts):
+        value += abs(float(part)) / 60 ** i
+    return -value if negative else value
+
+
+class _Vector:
+    """A property vector: its definition attributes, members and state"""
+
+    def __init__(self, kind, name, label, group, perm, state, members, handler, **extra):
+        self.kind = kind          # "Number" or "Switch"
+        self.name = name
+        self.attrs = dict(label=label, group=group, perm=perm, timeout="60", **extra)
+        self.state = state
+        self.members = members    # member name -> (attributes, value)
+        self.handler = handler
+
+    def format_value(self, value):
+        if self.kind == "Switch":
+            return "On" if value else "Off"
+        return f"{value:.6f}"
+
+
+class IndiDevice:
+    """
+    One INDI device served over a pair of byte streams
+
+    Properties are defined with define_number()/define_switch() before
+    start(). Their definitions are sent whenever indiserver asks with
+    getProperties; set_number()/set_switch() send updates and may be called
+    from any thread. A client's newNumberVector/newSwitchVector is passed to
+    the property's handler as a {member: value} dict on the reader thread, so
+    handlers must not block; the handler reports the outcome with a set_*().
+
+    Args:
+        name: Device name shown to clients
+        instream: Binary stream of XML from indiserver (default stdin)
+        outstream: Binary stream of XML to indiserver (default stdout)
+    """
+
+    def __init__(self, name, instream=None, outstream=None):
+        self.name = name
+        self._in = instream if instream is not None else sys.stdin.buffer
+        self._out = outstream if outstream is not None else sys.stdout.buffer
+        self._vectors = {}
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self.closed = threading.Event()   # Set when indiserver closes the stream
+
+    def define_number(self, name, label, group, perm, members, state=IPS_IDLE, handler=None):
+        """
+        Add a number vector
+
+        Args:
+            members: Sequence of (name, label, format, min, max, step, value)
+        """
+        self._vectors[name] = _Vector("Number", name, label, group, perm, state, {
+            m_name: ({"label": m_label, "format": fmt, "min": str(lo), "max": str(hi), "step": str(step)},
+                     value)
+            for m_name, m_label, fmt, lo, hi, step, value in members
+        }, handler)
+
+    def define_switch(self, name, label, group, perm, members, state=IPS_IDLE, handler=None,
+                      rule="OneOfMany"):
+        """
+        Add a switch vector
+
+        Args:
+            members: Sequence of (name, label, on)
+        """
+        self._vectors[name] = _Vector("Switch", name, label, group, perm, state, {
+            m_name: ({"label": m_label}, bool(on)) for m_name, m_label, on in members
+        }, handler, rule=rule)
+
+    def set_number(self, name, values, state=None):
+        """Update members of a number vector and send them to clients"""
+        self._set(name, values, state)
+
+    def set_switch(self, name, values, state=None):
+        """Update members of a switch vector and send them to clients"""
+        self._set(name, values, state)
+
+    def start(self):
+        """Start reading client requests from indiserver"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='IndiDevice')
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info(f"Serving INDI device '{self.name}'")
+
+    def _set(self, name, values, state):
+        vector = self._vectors[name]
+        with self._write_lock:
+            for member, value in values.items():
+                attrs, _ = vector.members[member]
+                vector.members[member] = (attrs, value)
+            if state is not None:
+                vector.state = state
+            element = ET.Element(f"set{vector.kind}Vector", device=self.name, name=name,
+                                 state=vector.state, timestamp=self._timestamp())
+            for member in values:
+                one = ET.SubElement(element, f"one{vector.kind}", name=member)
+                one.text = vector.format_value(vector.members[member][1])
+            self._write(element)
+
+    def _define(self, vector):
+        """Send the definition of a vector (write lock held)"""
+        element = ET.Element(f"def{vector.kind}Vector", device=self.name, name=vector.name,
+                             state=vector.state, timestamp=self._timestamp(), **vector.attrs)
+        for member, (attrs, value) in vector.members.items():
+            one = ET.SubElement(element, f"def{vector.kind}", name=member, **attrs)
+            one.text = vector.format_value(value)
+        self._write(element)
+
+    def _write(self, element):
+        """Write one element to indiserver (write lock held)"""
+        try:
+            self._out.write(ET.tostring(element) + b"\n")
+            self._out.flush()
+        except (OSError, ValueError):
+            # indiserver went away; the reader sees the end of the stream
+            pass
+
+    @staticmethod
+    def _timestamp():
+        return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime())
+
+    def _run(self):
+        """Reader thread: parse the stream of top-level XML elements"""
+        parser = ET.XMLPullParser(events=("start", "end"))
+        # The stream has no root element, so give it one
+        parser.feed(b"<INDI>")
+        root = None
+        depth = 0
+        try:
+            while True:
+                data = self._in.read1(4096)
+                if not data:
+                    break
+                parser.feed(data)
+                for event, element in parser.read_events():
+                    if event == "start":
+                        if root is None:
+                            root = element
+                        depth += 1
+                        continue
+                    depth -= 1
+                    if depth == 1:
+                        self._dispatch(element)
+                        root.clear()
+        except ET.ParseError as e:
+            logger.error(f"Malformed INDI message: {e}")
+        finally:
+            logger.info("indiserver closed the connection")
+            self.closed.set()
+
+    def _dispatch(self, element):
+        """Handle one request from indiserver"""
+        device = element.get("device")
+        if device is not None and device != self.name:
+            return
+
+        if element.tag == "getProperties":
+            name = element.get("name")
+            with self._write_lock:
+                for vector in self._vectors.values():
+                    if name is None or name == vector.name:
+                        self._define(vector)
+            return
+
+        vector = self._vectors.get(element.get("name"))
+        if vector is None or element.tag != f"new{vector.kind}Vector" or vector.handler is None:
+            return
+
+        values = {}
+        for one in element.iter(f"one{vector.kind}"):
+            member = one.get("name")
+            if member not in vector.members:
+                continue
+            text = (one.text or "").strip()
+            try:
+                values[member] = text == "On" if vector.kind == "Switch" else parse_number(text)
+            except ValueError:
+                logger.warning(f"Ignoring {vector.name}.{member}: bad value {text!r}")
+        if not values:
+            return
+
+        try:
+            vector.handler(values)
+        except Exception:
+            logger.exception(f"Handling {vector.name} failed")
+            self._set(vector.name, {}, IPS_ALERT)
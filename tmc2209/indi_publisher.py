@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Coalesced mount state publishing for the TMC2209 telescope driver
+The motion threads write the latest axis positions into a MotionSnapshot and
+a background thread converts them to RA/Dec and publishes them at a fixed,
+low rate
+"""
+import threading
+import logging
+
+logger = logging.getLogger('TelescopeDriver.publisher')
+
+
+class MotionSnapshot:
+    """Latest mount state shared between the motion loops and the publisher
+
+    Writers only do plain attribute stores (atomic under the GIL), so the
+    step loops never take a lock or wait on the publisher. The publisher may
+    read fields that are a step apart, which is harmless at display rate.
+    """
+    __slots__ = ('ra_steps', 'dec_steps', 'ra_slewing', 'dec_slewing', 'is_tracking')
+
+    def __init__(self):
+        self.ra_steps = 0       # RA axis position in microsteps (without tracking steps)
+        self.dec_steps = 0      # DEC axis position in microsteps
+        # Per axis, since a GOTO slews both axes from different threads
+        self.ra_slewing = False
+        self.dec_slewing = False
+        self.is_tracking = False
+
+    def read(self):
+        """Return the current state as a comparable tuple"""
+        return (self.ra_steps, self.dec_steps, self.ra_slewing or self.dec_slewing, self.is_tracking)
+
+
+class IndiPositionPublisher:
+    """Change-driven, rate-limited publisher of a MotionSnapshot
+
+    Every 1/rate_hz seconds the snapshot is sampled and converted with
+    to_equatorial(ra_steps, dec_steps) -> (ra_hours, dec_deg); if the result
+    differs from the last published state at display resolution (1 s of RA,
+    1 arcsec of Dec), publish(ra_hours, dec_deg, is_slewing, is_tracking) is
+    called once. Any number of steps in between coalesce into one update.
+    """
+
+    def __init__(self, snapshot, publish, to_equatorial, rate_hz=2.0):
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        self.snapshot = snapshot
+        self.publish = publish
+        self.to_equatorial = to_equatorial
+        self.period = 1.0 / rate_hz
+        self.published_count = 0
+        self._last_state = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the publisher thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='IndiPublisher')
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info(f"INDI publisher started at {1.0 / self.period:.1f} Hz")
+
+    def stop(self):
+        """Stop the publisher thread, flushing the final state first"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def flush(self):
+        """Publish the snapshot now if it changed since the last update"""
+        ra_steps, dec_steps, is_slewing, is_tracking = self.snapshot.read()
+        ra_hours, dec_deg = self.to_equatorial(ra_steps, dec_steps)
+        # The sky drifts past an idle mount, so compare at display resolution
+        state = (round(ra_hours * 3600), round(dec_deg * 3600), is_slewing, is_tracking)
+        if state == self._last_state:
+            return False
+
+        try:
+            self.publish(ra_hours, dec_deg, is_slewing, is_tracking)
+        except Exception as e:
+            # Keep the last state so the update is retried on the next tick
+            logger.warning(f"Failed to publish INDI properties: {e}")
+            return False
+
+        self._last_state = state
+        self.published_count += 1
+        return True
+
+    def _run(self):
+        """Worker thread sampling the snapshot at the configured rate"""
+        while not self._stop.wait(self.period):
+            self.flush()
@@ -10,29 +10,57 @@ import math
 import threading
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from telemetry import setup_logging, TelemetryRing
+
 logger = logging.getLogger('TelescopeDriver')
 
+# Queue handler installed by main(); importing the driver leaves logging alone
+log_handler = None
+
+from indi_device import (IndiDevice, running_under_indiserver,
+                         IPS_IDLE, IPS_OK, IPS_BUSY, IPS_ALERT)
+
+# Started by indiserver, the script is the mount's INDI device and talks to it
+# over stdin/stdout; started by hand, it connects to a server as a client
+INDI_DEVICE_MODE = running_under_indiserver()
+
 # Try to import PyIndi - if not available, guide the user to install it
 try:
     import PyIndi
+    IndiBaseClient = PyIndi.BaseClient
 except ImportError:
-    logger.error("PyIndi module not found. Install with: pip install pyindi-client")
-    logger.error("If that fails, install from source: https://github.com/indilib/pyindi-client")
-    sys.exit(1)
+    if not INDI_DEVICE_MODE:
+        logger.error("PyIndi module not found. Install with: pip install pyindi-client")
+        logger.error("If that fails, install from source: https://github.com/indilib/pyindi-client")
+        sys.exit(1)
+    # The device side only needs the standard library
+    IndiBaseClient = object
 
-# Try to import RPi.GPIO for motor control
-try:
-    import RPi.GPIO as GPIO
-except ImportError:
-    logger.error("RPi.GPIO module not found. Install with: pip install RPi.GPIO")
-    sys.exit(1)
+# Use the simulated mount instead of real hardware with TELESCOPE_GPIO=sim
+SIMULATED_GPIO = os.environ.get("TELESCOPE_GPIO") == "sim"
+
+if SIMULATED_GPIO:
+    from mount_simulator import SimulatedGPIO, StepperModel, SimulatedEncoder
+    GPIO = SimulatedGPIO(clock=time.monotonic)
+else:
+    # Try to import RPi.GPIO for motor control
+    try:
+        import RPi.GPIO as GPIO
+    except ImportError:
+        logger.error("RPi.GPIO module not found. Install with: pip install RPi.GPIO")
+        sys.exit(1)
+
+from indi_publisher import MotionSnapshot, IndiPositionPublisher
+from motion_trace import MotionTraceRecorder, AXIS_RA, AXIS_DEC
+from guiding import PulseGuider, GuideAccumulator, GUIDE_NORTH, GUIDE_SOUTH, GUIDE_EAST, GUIDE_WEST
+from motion_profile import (AxisLimits, BacklashCompensator, ramp_intervals, load_tuning_profile,
+                            save_tuning_profile, axis_limits, axis_backlash, set_axis_backlash,
+                            DEFAULT_PROFILE_PATH)
+from goto_planner import GotoPlanner, MountLimits, axis_to_equatorial
+from coord_transform import TransformPipeline, PointingModel
+from encoders import AxisEncoder, GpioEdgeBackend, PigpioEdgeBackend, measure_backlash
 
-class IndiTelescopeDriver(PyIndi.BaseClient):
+class IndiTelescopeDriver(IndiBaseClient):
     """INDI client implementation for a TMC2209-controlled telescope"""
     
     def __init__(self):
@@ -52,13 +80,92 @@ class IndiTelescopeDriver(PyIndi.BaseClient):
         self.MICROSTEPS = 16              # Microstepping factor
         self.GEAR_RATIO = 100             # Gear reduction ratio
         self.STEPS_PER_DEG = (self.STEPS_PER_REV * self.MICROSTEPS * self.GEAR_RATIO) / 360
+        self.SIDEREAL_RATE = 360.0 / 86164.0  # Degrees per second (one sidereal day)
+        self.GUIDE_RATE = 0.5                 # Guide speed as a fraction of sidereal
+        
+        # Slew limits from the tuning profile written by characterize.py;
+        # without one, slews run at the fixed 0.0002s half-period without a ramp
+        self.TUNING_PROFILE_PATH = os.environ.get("TELESCOPE_PROFILE", DEFAULT_PROFILE_PATH)
+        default_limits = AxisLimits(max_rate=1 / (2 * 0.0002))
+        self.tuning_profile = load_tuning_profile(self.TUNING_PROFILE_PATH)
+        self.ra_limits = axis_limits(self.tuning_profile, "RA", self.MICROSTEPS, default_limits)
+        self.dec_limits = axis_limits(self.tuning_profile, "DEC", self.MICROSTEPS, default_limits)
+        
+        # Gear lash taken up at the start of every reversing move; measured
+        # with measure_backlash() and stored in the tuning profile
+        self.backlash = {
+            AXIS_RA: BacklashCompensator(axis_backlash(self.tuning_profile, "RA", self.MICROSTEPS)),
+            AXIS_DEC: BacklashCompensator(axis_backlash(self.tuning_profile, "DEC", self.MICROSTEPS)),
+        }
+        self.SIM_BACKLASH_STEPS = 0   # Gear lash of the simulated mount in microsteps
+        
+        # Site and mechanical limits for GOTO planning
+        self.LATITUDE = 40.0     # Degrees north
+        self.LONGITUDE = -3.7    # Degrees east (negative is west)
+        self.mount_limits = MountLimits(
+            ra_axis_min=-180.0, ra_axis_max=180.0,   # Cable wrap on the RA axis
+            meridian_limit=15.0,                     # Track up to 1h past the meridian
+            min_altitude=10.0,
+        )
+        self.planner = GotoPlanner(
+            self.STEPS_PER_DEG, self.ra_limits, self.dec_limits,
+            self.LATITUDE, self.LONGITUDE, self.mount_limits,
+        )
+        
+        # Batch J2000 -> step conversion for target lists and mosaics;
+        # fill in the pointing model terms from a polar alignment run
+        self.pointing_model = PointingModel()
+        self.transforms = TransformPipeline(
+            self.LATITUDE, self.LONGITUDE, self.STEPS_PER_DEG,
+            self.pointing_model, self.mount_limits,
+        )
+        
+        # INDI publishing parameters
+        self.INDI_DEVICE_NAME = "TMC2209 Telescope"  # Device name served (or followed as a client)
+        self.PUBLISH_RATE_HZ = 2.0                   # Max state updates per second
+        
+        # Optional quadrature encoders on the axes for closed-loop correction
+        self.ENCODER_PINS_RA = None           # (A, B) BCM pins, e.g. (5, 6)
+        self.ENCODER_PINS_DEC = None
+        self.ENCODER_COUNTS_PER_REV = 40000   # Quadrature counts per axis revolution
+        self.ENCODER_TOLERANCE = 16           # Microsteps of error tolerated before correcting
+        self.ENCODER_CHECK_INTERVAL = 2.0     # Seconds between checks while tracking
+        self.CORRECTION_RATE = 500            # Steps/s used for correction moves
+        
+        # Motion trace recording (set to a file path to log every step edge)
+        self.TRACE_PATH = os.environ.get("TELESCOPE_TRACE")
         
         # Motor state tracking
         self.ra_position = 0    # in degrees
         self.dec_position = 0   # in degrees
         self.is_tracking = False
         self.tracking_thread = None
-        self.stop_tracking = threading.Event()
+        self._stop_tracking_event = threading.Event()
+        self.tracking_steps = 0  # RA steps taken by the tracking loop
+        
+        # Each axis is owned either by a slew or by the tracking loop
+        self.ra_lock = threading.Lock()
+        self.dec_lock = threading.Lock()
+        
+        # Guide pulses are applied as rate offsets inside the tracking loop
+        self.guider = PulseGuider(self.GUIDE_RATE)
+        
+        # Live state for INDI clients - the motion loops only write to it
+        self.snapshot = MotionSnapshot()
+        self.publisher = IndiPositionPublisher(
+            self.snapshot, self.publish_state, self._equatorial_position, self.PUBLISH_RATE_HZ
+        )
+        self.reported_state = None   # Last (ra_hours, dec_deg, is_slewing, is_tracking) published
+        self.device = None           # IndiDevice when run by indiserver
+        
+        # Optional step edge recorder for offline analysis (see motion_trace.py)
+        self.trace = MotionTraceRecorder(self.TRACE_PATH) if self.TRACE_PATH else None
+        
+        # Motion events are formatted and logged off the hot path
+        self.telemetry = TelemetryRing(logger)
+        self._ev_move_ra = self.telemetry.event(logging.INFO, "Moving RA motor {a} degrees ({b} steps)")
+        self._ev_move_dec = self.telemetry.event(logging.INFO, "Moving DEC motor {a} degrees ({b} steps)")
+        self.telemetry.start()
         
         # Initialize GPIO
         self._setup_gpio()
@@ -69,6 +176,17 @@ class IndiTelescopeDriver(PyIndi.BaseClient):
         """Setup GPIO pins for motor control"""
         GPIO.setmode(GPIO.BCM)
         
+        # Wire simulated motors to the same pins as the real drivers
+        if SIMULATED_GPIO:
+            for name, step_pin, dir_pin, enable_pin in (
+                ("RA", self.STEP_PIN_RA, self.DIR_PIN_RA, self.ENABLE_PIN_RA),
+                ("DEC", self.STEP_PIN_DEC, self.DIR_PIN_DEC, self.ENABLE_PIN_DEC),
+            ):
+                model = StepperModel(self.STEPS_PER_REV, self.MICROSTEPS, self.GEAR_RATIO,
+                                     backlash=self.SIM_BACKLASH_STEPS)
+                GPIO.attach_axis(name, model, step_pin, dir_pin, enable_pin)
+            logger.info("Using simulated mount instead of GPIO hardware")
+        
         # Setup RA motor pins
         GPIO.setup(self.STEP_PIN_RA, GPIO.OUT)
         GPIO.setup(self.DIR_PIN_RA, GPIO.OUT)
@@ -82,6 +200,31 @@ class IndiTelescopeDriver(PyIndi.BaseClient):
         # Initially disable motors
         GPIO.output(self.ENABLE_PIN_RA, GPIO.HIGH)
         GPIO.output(self.ENABLE_PIN_DEC, GPIO.HIGH)
+        
+        self.encoders = self._setup_encoders()
+    
+    def _setup_encoders(self):
+        """Create encoders for the axes that have them (always in simulation)"""
+        encoders = {}
+        for axis, name, pins in ((AXIS_RA, "RA", self.ENCODER_PINS_RA),
+                                 (AXIS_DEC, "DEC", self.ENCODER_PINS_DEC)):
+            if SIMULATED_GPIO:
+                backend = SimulatedEncoder(GPIO.axes[name][0], self.ENCODER_COUNTS_PER_REV, GPIO.time)
+            elif pins is None:
+                continue
+            else:
+                # pigpio samples edges far faster than RPi.GPIO interrupts
+                try:
+                    backend = PigpioEdgeBackend(*pins)
+                except (ImportError, RuntimeError) as e:
+                    logger.warning(f"pigpio unavailable ({e}), using RPi.GPIO interrupts for the {name} encoder")
+                    backend = GpioEdgeBackend(GPIO, *pins)
+            
+            encoders[axis] = AxisEncoder(
+                name, backend, self.ENCODER_COUNTS_PER_REV, self.STEPS_PER_DEG, self.ENCODER_TOLERANCE
+            )
+            logger.info(f"{name} encoder enabled for closed-loop correction")
+        return encoders
     
     def connect_server(self):
         """Connect to the INDI server"""
@@ -90,8 +233,115 @@ class IndiTelescopeDriver(PyIndi.BaseClient):
             logger.error("Failed to connect to INDI server")
             return False
         logger.info("Connected to INDI server")
+        self.publisher.start()
         return True
     
+    def start_device(self, instream=None, outstream=None):
+        """
+        Serve the mount as an INDI device over stdin/stdout (run by indiserver)
+        
+        Returns:
+            The IndiDevice; its closed event is set when indiserver goes away
+        """
+        device = IndiDevice(self.INDI_DEVICE_NAME, instream, outstream)
+        device.define_switch("CONNECTION", "Connection", "Main Control", "rw",
+                             [("CONNECT", "Connect", True), ("DISCONNECT", "Disconnect", False)],
+                             state=IPS_OK, handler=self._on_connection)
+        device.define_number("EQUATORIAL_EOD_COORD", "Eq. Coordinates", "Main Control", "rw",
+                             [("RA", "RA (hh:mm:ss)", "%010.6m", 0, 24, 0, 0.0),
+                              ("DEC", "DEC (dd:mm:ss)", "%010.6m", -90, 90, 0, 0.0)],
+                             handler=self._on_goto)
+        device.define_switch("TELESCOPE_TRACK_STATE", "Tracking", "Main Control", "rw",
+                             [("TRACK_ON", "On", False), ("TRACK_OFF", "Off", True)],
+                             handler=self._on_track_state)
+        for name, label, members in (
+            ("TELESCOPE_TIMED_GUIDE_NS", "Guide N/S", (("TIMED_GUIDE_N", "North (ms)"), ("TIMED_GUIDE_S", "South (ms)"))),
+            ("TELESCOPE_TIMED_GUIDE_WE", "Guide W/E", (("TIMED_GUIDE_W", "West (ms)"), ("TIMED_GUIDE_E", "East (ms)"))),
+        ):
+            device.define_number(name, label, "Guide", "rw",
+                                 [(member, member_label, "%.f", 0, 60000, 1, 0.0) for member, member_label in members],
+                                 handler=lambda values, name=name: self._on_timed_guide(name, values))
+        self.device = device
+        device.start()
+        self.publisher.start()
+        return device
+    
+    def _on_connection(self, values):
+        """CONNECTION from a client (device reader thread)"""
+        # The motors are driven from startup; disconnecting stops tracking
+        connect = values.get("CONNECT", not values.get("DISCONNECT", False))
+        if not connect:
+            self.stop_tracking()
+        self.device.set_switch("CONNECTION", {"CONNECT": connect, "DISCONNECT": not connect}, IPS_OK)
+    
+    def _on_goto(self, values):
+        """EQUATORIAL_EOD_COORD from a client (device reader thread)"""
+        ra_hours, dec_deg = self._equatorial_position(self.snapshot.ra_steps, self.snapshot.dec_steps)
+        ra_hours = values.get("RA", ra_hours)
+        dec_deg = values.get("DEC", dec_deg)
+        
+        def slew():
+            state = IPS_ALERT if self.goto(ra_hours, dec_deg) is None else IPS_OK
+            self.device.set_number("EQUATORIAL_EOD_COORD", {}, state)
+        
+        # The slew outlives the request; the publisher reports its progress
+        self.device.set_number("EQUATORIAL_EOD_COORD", {}, IPS_BUSY)
+        threading.Thread(target=slew, name='IndiGoto', daemon=True).start()
+    
+    def _on_track_state(self, values):
+        """TELESCOPE_TRACK_STATE from a client (device reader thread)"""
+        if values.get("TRACK_ON", not values.get("TRACK_OFF", True)):
+            self.start_tracking()
+        else:
+            self.stop_tracking()
+    
+    def _on_timed_guide(self, name, values):
+        """TELESCOPE_TIMED_GUIDE_NS/WE from a guider (device reader thread)"""
+        directions = {"TIMED_GUIDE_N": GUIDE_NORTH, "TIMED_GUIDE_S": GUIDE_SOUTH,
+                      "TIMED_GUIDE_W": GUIDE_WEST, "TIMED_GUIDE_E": GUIDE_EAST}
+        duration_ms = 0
+        for member, value in values.items():
+            if value > 0:
+                if not self.pulse_guide(directions[member], value):
+                    self.device.set_number(name, {}, IPS_ALERT)
+                    return
+                duration_ms = max(duration_ms, value)
+        
+        # Guiders wait for the property to return to Ok before the next pulse
+        idle = dict.fromkeys(values, 0.0)
+        self.device.set_number(name, {}, IPS_BUSY)
+        timer = threading.Timer(duration_ms / 1000.0, self.device.set_number, (name, idle, IPS_OK))
+        timer.daemon = True
+        timer.start()
+    
+    def publish_state(self, ra_hours, dec_deg, is_slewing, is_tracking):
+        """
+        Send the mount state to INDI clients (publisher thread only)
+        
+        Run by indiserver, the position goes out as EQUATORIAL_EOD_COORD (Busy
+        while slewing) and tracking as TELESCOPE_TRACK_STATE. Connected as a
+        client there is nothing to publish to - writing those properties
+        would command the device - so the state is only kept in
+        reported_state and logged.
+        """
+        self.reported_state = (ra_hours, dec_deg, is_slewing, is_tracking)
+        device = self.device
+        if device is None:
+            logger.debug(f"Mount at RA {ra_hours:.4f}h Dec {dec_deg:.4f}°, "
+                         f"{'slewing' if is_slewing else 'idle'}, tracking {'on' if is_tracking else 'off'}")
+            return
+        
+        device.set_number("EQUATORIAL_EOD_COORD", {"RA": ra_hours, "DEC": dec_deg},
+                          IPS_BUSY if is_slewing else IPS_OK)
+        device.set_switch("TELESCOPE_TRACK_STATE", {"TRACK_ON": is_tracking, "TRACK_OFF": not is_tracking},
+                          IPS_BUSY if is_tracking else IPS_IDLE)
+    
+    def _equatorial_position(self, ra_steps, dec_steps):
+        """RA (hours) and Dec (degrees) for snapshot axis positions (publisher thread)"""
+        # Tracking steps turn the RA axis but are kept out of ra_steps
+        ra_axis = (ra_steps + self.tracking_steps) / self.STEPS_PER_DEG
+        return axis_to_equatorial(ra_axis, dec_steps / self.STEPS_PER_DEG, self.LONGITUDE)
+    
     def newDevice(self, deviceName):
         """Callback when a new device is detected - override from BaseClient"""
         logger.info(f"New device: {deviceName}")
@@ -102,60 +352,236 @@ class IndiTelescopeDriver(PyIndi.BaseClient):
         name = property.getName()
         logger.debug(f"New property: {device}.{name}")
     
-    def move_ra(self, degrees, direction=1):
-        """Move Right Ascension motor by specified degrees"""
-        steps = int(abs(degrees) * self.STEPS_PER_DEG)
-        
-        # Enable motor
-        GPIO.output(self.ENABLE_PIN_RA, GPIO.LOW)
-        
-        # Set direction
-        GPIO.output(self.DIR_PIN_RA, GPIO.HIGH if direction > 0 else GPIO.LOW)
-        
-        # Calculate step delay for sidereal tracking (if needed)
-        # This is simplified - real implementation would be more precise
-        step_delay = 0.0002  # Default fast slew
-        
-        logger.info(f"Moving RA motor {degrees} degrees ({steps} steps)")
-        
-        # Perform steps
-        for _ in range(steps):
-            GPIO.output(self.STEP_PIN_RA, GPIO.HIGH)
-            time.sleep(step_delay)
-            GPIO.output(self.STEP_PIN_RA, GPIO.LOW)
-            time.sleep(step_delay)
+    def newNumber(self, nvp):
+        """Callback when a number property changes - handles timed guide pulses"""
+        if nvp.device != self.INDI_DEVICE_NAME:
+            return
         
-        # Update position
-        self.ra_position += degrees * direction
+        if nvp.name == "TELESCOPE_TIMED_GUIDE_NS":
+            pulses = ((GUIDE_NORTH, nvp[0].value), (GUIDE_SOUTH, nvp[1].value))
+        elif nvp.name == "TELESCOPE_TIMED_GUIDE_WE":
+            pulses = ((GUIDE_WEST, nvp[0].value), (GUIDE_EAST, nvp[1].value))
+        else:
+            return
         
-        # Disable motor if not tracking
-        if not self.is_tracking:
-            GPIO.output(self.ENABLE_PIN_RA, GPIO.HIGH)
+        for direction, duration_ms in pulses:
+            if duration_ms > 0:
+                self.pulse_guide(direction, duration_ms)
+    
+    def move_ra(self, degrees, direction=1):
+        """Move Right Ascension motor by specified degrees"""
+        # Take the axis from the tracking loop for the duration of the slew
+        with self.ra_lock:
+            steps = int(abs(degrees) * self.STEPS_PER_DEG)
+            
+            # Enable motor
+            GPIO.output(self.ENABLE_PIN_RA, GPIO.LOW)
+            
+            # Set direction
+            GPIO.output(self.DIR_PIN_RA, GPIO.HIGH if direction > 0 else GPIO.LOW)
+            
+            # A reversal first takes up the gear lash; those steps lead the
+            # same ramp, so they run at speed instead of as a separate move
+            step_sign = 1 if direction > 0 else -1
+            take_up = self.backlash[AXIS_RA].take_up(step_sign) if steps else 0
+            
+            # Step timing ramps up to the tuned maximum rate
+            intervals = ramp_intervals(take_up + steps, self.ra_limits.max_rate, self.ra_limits.max_accel)
+            
+            self.telemetry.emit(self._ev_move_ra, degrees, steps)
+            
+            snapshot = self.snapshot
+            trace = self.trace
+            start_steps = snapshot.ra_steps - take_up * step_sign
+            snapshot.ra_slewing = True
+            
+            # Perform steps
+            for i, interval in enumerate(intervals, 1):
+                half_period = interval / 2
+                GPIO.output(self.STEP_PIN_RA, GPIO.HIGH)
+                if trace is not None:
+                    trace.record(AXIS_RA, step_sign)
+                time.sleep(half_period)
+                GPIO.output(self.STEP_PIN_RA, GPIO.LOW)
+                time.sleep(half_period)
+                if i > take_up:
+                    snapshot.ra_steps = start_steps + i * step_sign
+            
+            # Update position with the steps that moved the axis
+            self.ra_position += step_sign * steps / self.STEPS_PER_DEG
+            snapshot.ra_steps = round(self.ra_position * self.STEPS_PER_DEG)
+            snapshot.ra_slewing = False
+            
+            # Step out any error the encoder measured
+            self._correct_position(AXIS_RA)
+            
+            # Disable motor if not tracking
+            if not self.is_tracking:
+                GPIO.output(self.ENABLE_PIN_RA, GPIO.HIGH)
     
     def move_dec(self, degrees, direction=1):
         """Move Declination motor by specified degrees"""
-        steps = int(abs(degrees) * self.STEPS_PER_DEG)
-        
-        # Enable motor
-        GPIO.output(self.ENABLE_PIN_DEC, GPIO.LOW)
-        
-        # Set direction
-        GPIO.output(self.DIR_PIN_DEC, GPIO.HIGH if direction > 0 else GPIO.LOW)
-        
-        logger.info(f"Moving DEC motor {degrees} degrees ({steps} steps)")
-        
-        # Perform steps
-        for _ in range(steps):
-            GPIO.output(self.STEP_PIN_DEC, GPIO.HIGH)
-            time.sleep(0.0002)
-            GPIO.output(self.STEP_PIN_DEC, GPIO.LOW)
-            time.sleep(0.0002)
-        
-        # Update position
-        self.dec_position += degrees * direction
-        
-        # Disable motor
-        GPIO.output(self.ENABLE_PIN_DEC, GPIO.HIGH)
+        # Take the axis from the tracking loop for the duration of the slew
+        with self.dec_lock:
+            steps = int(abs(degrees) * self.STEPS_PER_DEG)
+            
+            # Enable motor
+            GPIO.output(self.ENABLE_PIN_DEC, GPIO.LOW)
+            
+            # Set direction
+            GPIO.output(self.DIR_PIN_DEC, GPIO.HIGH if direction > 0 else GPIO.LOW)
+            
+            # A reversal first takes up the gear lash; those steps lead the
+            # same ramp, so they run at speed instead of as a separate move
+            step_sign = 1 if direction > 0 else -1
+            take_up = self.backlash[AXIS_DEC].take_up(step_sign) if steps else 0
+            
+            # Step timing ramps up to the tuned maximum rate
+            intervals = ramp_intervals(take_up + steps, self.dec_limits.max_rate, self.dec_limits.max_accel)
+            
+            self.telemetry.emit(self._ev_move_dec, degrees, steps)
+            
+            snapshot = self.snapshot
+            trace = self.trace
+            start_steps = snapshot.dec_steps - take_up * step_sign
+            snapshot.dec_slewing = True
+            
+            # Perform steps
+            for i, interval in enumerate(intervals, 1):
+                half_period = interval / 2
+                GPIO.output(self.STEP_PIN_DEC, GPIO.HIGH)
+                if trace is not None:
+                    trace.record(AXIS_DEC, step_sign)
+                time.sleep(half_period)
+                GPIO.output(self.STEP_PIN_DEC, GPIO.LOW)
+                time.sleep(half_period)
+                if i > take_up:
+                    snapshot.dec_steps = start_steps + i * step_sign
+            
+            # Update position with the steps that moved the axis
+            self.dec_position += step_sign * steps / self.STEPS_PER_DEG
+            snapshot.dec_steps = round(self.dec_position * self.STEPS_PER_DEG)
+            snapshot.dec_slewing = False
+            
+            # Step out any error the encoder measured
+            self._correct_position(AXIS_DEC)
+            
+            # Disable motor
+            GPIO.output(self.ENABLE_PIN_DEC, GPIO.HIGH)
+    
+    def _commanded_steps(self, axis):
+        """Axis position in microsteps from home, as commanded by slews, tracking and guiding"""
+        if axis == AXIS_RA:
+            return self.ra_position * self.STEPS_PER_DEG + self.tracking_steps
+        return self.dec_position * self.STEPS_PER_DEG
+    
+    def _correct_position(self, axis):
+        """Correct the error between encoder and commanded position (axis lock held)"""
+        encoder = self.encoders.get(axis)
+        if encoder is None:
+            return 0
+        
+        correction = encoder.check(self._commanded_steps(axis))
+        if correction:
+            direction = 1 if correction > 0 else -1
+            take_up = self.backlash[axis].take_up(direction)
+            self._emit_steps(axis, correction + direction * take_up, self.CORRECTION_RATE)
+        return correction
+    
+    def _emit_steps(self, axis, steps, rate):
+        """Emit raw steps without changing the commanded position (axis lock held)"""
+        if axis == AXIS_RA:
+            step_pin, dir_pin, enable_pin = self.STEP_PIN_RA, self.DIR_PIN_RA, self.ENABLE_PIN_RA
+        else:
+            step_pin, dir_pin, enable_pin = self.STEP_PIN_DEC, self.DIR_PIN_DEC, self.ENABLE_PIN_DEC
+        
+        direction = 1 if steps > 0 else -1
+        GPIO.output(enable_pin, GPIO.LOW)
+        GPIO.output(dir_pin, GPIO.HIGH if direction > 0 else GPIO.LOW)
+        half_period = 0.5 / rate
+        for _ in range(abs(steps)):
+            GPIO.output(step_pin, GPIO.HIGH)
+            if self.trace is not None:
+                self.trace.record(axis, direction)
+            time.sleep(half_period)
+            GPIO.output(step_pin, GPIO.LOW)
+            time.sleep(half_period)
+    
+    def measure_backlash(self, axis, max_steps=2000, save=True):
+        """
+        Measure the gear lash of an axis with its encoder
+        
+        Args:
+            axis: AXIS_RA or AXIS_DEC
+            max_steps: Steps to try in each direction before giving up
+            save: Store the result in the tuning profile
+        
+        Returns:
+            Backlash in microsteps, or None if it could not be measured
+        """
+        encoder = self.encoders.get(axis)
+        if encoder is None:
+            logger.error("Measuring backlash requires an encoder on the axis")
+            return None
+        
+        name = "RA" if axis == AXIS_RA else "DEC"
+        lock = self.ra_lock if axis == AXIS_RA else self.dec_lock
+        with lock:
+            def step(direction):
+                self._emit_steps(axis, direction, self.CORRECTION_RATE)
+            
+            backlash = measure_backlash(encoder, step, max_steps)
+            
+            # The measurement ends moving in reverse with the lash closed; the
+            # encoder correction then returns the axis to its commanded position
+            compensator = self.backlash[axis]
+            if backlash is None:
+                compensator.direction = 0
+            else:
+                compensator.direction = -1
+                compensator.steps = backlash
+            self._correct_position(axis)
+            
+            if axis == AXIS_DEC:
+                GPIO.output(self.ENABLE_PIN_DEC, GPIO.HIGH)
+            elif not self.is_tracking:
+                GPIO.output(self.ENABLE_PIN_RA, GPIO.HIGH)
+        
+        if backlash is not None and save:
+            set_axis_backlash(self.tuning_profile, name, self.MICROSTEPS, backlash)
+            save_tuning_profile(self.tuning_profile, self.TUNING_PROFILE_PATH)
+        return backlash
+    
+    def telemetry_status(self):
+        """Emitted, dropped and pending counts of the logging pipeline"""
+        stats = self.telemetry.stats()
+        stats['log_dropped'] = log_handler.dropped if log_handler is not None else 0
+        return stats
+    
+    def encoder_status(self):
+        """Encoder error and lost-step statistics per axis ("RA"/"DEC")"""
+        return {encoder.name: encoder.status() for encoder in self.encoders.values()}
+    
+    def goto(self, ra_hours, dec_deg):
+        """Slew to RA/Dec (epoch of date) along the fastest path within the mount limits"""
+        # Axis angles from home, including the RA motion made by tracking
+        ra_axis = self.ra_position + self.tracking_steps / self.STEPS_PER_DEG
+        try:
+            plan = self.planner.plan(ra_hours, dec_deg, ra_axis, self.dec_position)
+        except ValueError as e:
+            logger.error(f"GOTO rejected: {e}")
+            return None
+        
+        logger.info(f"GOTO RA {ra_hours:.4f}h Dec {dec_deg:.4f}°: {plan}")
+        
+        # Both axes move at once, so the slew takes as long as the slower one
+        dec_thread = threading.Thread(
+            target=self.move_dec, args=(abs(plan.dec_move), 1 if plan.dec_move >= 0 else -1)
+        )
+        dec_thread.start()
+        self.move_ra(abs(plan.ra_move), 1 if plan.ra_move >= 0 else -1)
+        dec_thread.join()
+        return plan
     
     def start_tracking(self):
         """Start sidereal tracking in RA axis"""
@@ -163,7 +589,7 @@ class IndiTelescopeDriver(PyIndi.BaseClient):
             return
         
         self.is_tracking = True
-        self.stop_tracking.clear()
+        self._stop_tracking_event.clear()
         
         # Enable RA motor for tracking
         GPIO.output(self.ENABLE_PIN_RA, GPIO.LOW)
@@ -173,6 +599,7 @@ class IndiTelescopeDriver(PyIndi.BaseClient):
         self.tracking_thread.daemon = True
         self.tracking_thread.start()
         
+        self.snapshot.is_tracking = True
         logger.info("Sidereal tracking started")
     
     def stop_tracking(self):
@@ -180,35 +607,161 @@ class IndiTelescopeDriver(PyIndi.BaseClient):
         if not self.is_tracking:
             return
         
-        self.stop_tracking.set()
+        self._stop_tracking_event.set()
+        self.guider.wake.set()
         if self.tracking_thread:
             self.tracking_thread.join()
         
-        # Disable RA motor
+        # Disable RA motor, and DEC if guiding enabled it
         GPIO.output(self.ENABLE_PIN_RA, GPIO.HIGH)
+        with self.dec_lock:
+            GPIO.output(self.ENABLE_PIN_DEC, GPIO.HIGH)
         
         self.is_tracking = False
+        self.snapshot.is_tracking = False
         logger.info("Sidereal tracking stopped")
     
+    def pulse_guide(self, direction, duration_ms):
+        """Apply a timed guide pulse (GUIDE_NORTH/SOUTH/EAST/WEST) while tracking"""
+        if not self.is_tracking:
+            logger.warning("Ignoring guide pulse: tracking is not active")
+            return False
+        
+        self.guider.pulse(direction, duration_ms)
+        return True
+    
+    def guide_latency(self):
+        """Latency between guide commands and the tracking loop applying them"""
+        return self.guider.latency_stats()
+    
     def _tracking_worker(self):
-        """Worker thread for sidereal tracking"""
+        """Worker thread for sidereal tracking with interleaved guide pulses"""
         # Earth rotates 360 degrees in ~86164 seconds (sidereal day)
-        # Calculate delay between steps based on our gearing
-        
-        sidereal_rate_deg_per_sec = 360.0 / 86164.0
-        steps_per_sec = sidereal_rate_deg_per_sec * self.STEPS_PER_DEG
-        step_delay = 0.5 / steps_per_sec  # Half period
-        
-        logger.info(f"Tracking at sidereal rate with step delay {step_delay:.6f}s")
-        
-        # Set RA direction for tracking (depends on hemisphere and mount type)
-        GPIO.output(self.DIR_PIN_RA, GPIO.HIGH)  # Adjust as needed
-        
-        while not self.stop_tracking.is_set():
-            GPIO.output(self.STEP_PIN_RA, GPIO.HIGH)
-            time.sleep(step_delay)
-            GPIO.output(self.STEP_PIN_RA, GPIO.LOW)
-            time.sleep(step_delay)
+        sidereal_steps_per_sec = self.SIDEREAL_RATE * self.STEPS_PER_DEG
+        
+        logger.info(f"Tracking at sidereal rate ({sidereal_steps_per_sec:.3f} steps/s)")
+        
+        guider = self.guider
+        wake = guider.wake
+        dec_guide = GuideAccumulator()
+        last_ra_step = time.monotonic()
+        next_check = last_ra_step + self.ENCODER_CHECK_INTERVAL if self.encoders else None
+        correction = dict.fromkeys(self.encoders, 0)   # Encoder error still to step out
+        correction_interval = 1.0 / self.CORRECTION_RATE
+        next_correction = None
+        
+        while not self._stop_tracking_event.is_set():
+            now = time.monotonic()
+            ra_offset, dec_offset, dec_end, pulse_end = guider.rates(now)
+            
+            # Step deadlines follow from the current rate, so a new guide
+            # pulse changes the very next interval
+            ra_interval = 1.0 / ((1.0 + ra_offset) * sidereal_steps_per_sec)
+            next_ra = last_ra_step + ra_interval
+            if now >= next_ra:
+                # Tracking direction depends on hemisphere and mount type
+                self._tracking_step(AXIS_RA, 1)
+                # Keep the average rate exact unless we fell more than a step behind
+                last_ra_step = next_ra if now - next_ra < ra_interval else now
+                next_ra = last_ra_step + ra_interval
+            
+            # DEC only moves while a guide pulse is active, interleaved with RA;
+            # fractions of a step carry over to the next pulse
+            dec_steps = dec_guide.update(now, dec_offset * sidereal_steps_per_sec, dec_end)
+            for _ in range(abs(dec_steps)):
+                self._tracking_step(AXIS_DEC, 1 if dec_steps > 0 else -1)
+            next_dec = dec_guide.next_step_time(now)
+            
+            # Periodically compare the encoders with the commanded position
+            if next_check is not None and now >= next_check:
+                for axis in self.encoders:
+                    if not correction[axis]:
+                        correction[axis] = self._tracking_check(axis)
+                next_check = now + self.ENCODER_CHECK_INTERVAL
+                if next_correction is None and any(correction.values()):
+                    next_correction = now
+            
+            # Errors are stepped out at CORRECTION_RATE between the tracking
+            # steps, so RA keeps tracking and guiding while they run
+            if next_correction is not None and now >= next_correction:
+                for axis, remaining in correction.items():
+                    if remaining:
+                        direction = 1 if remaining > 0 else -1
+                        if self._tracking_step(axis, direction, commanded=False):
+                            correction[axis] -= direction
+                        else:
+                            # A slew took the axis and corrects it when it ends
+                            correction[axis] = 0
+                if any(correction.values()):
+                    next_correction += correction_interval
+                    if now - next_correction >= correction_interval:
+                        next_correction = now
+                else:
+                    next_correction = None
+            
+            # Sleep until the next step or pulse end; a new pulse wakes us early
+            deadline = min(t for t in (next_ra, next_dec, pulse_end, next_check, next_correction)
+                           if t is not None)
+            timeout = deadline - time.monotonic()
+            if timeout > 0:
+                wake.wait(timeout)
+            wake.clear()
+    
+    def _tracking_check(self, axis):
+        """Encoder error in microsteps from the tracking loop (0 while a slew owns the axis)"""
+        lock = self.ra_lock if axis == AXIS_RA else self.dec_lock
+        if not lock.acquire(blocking=False):
+            return 0
+        try:
+            return self.encoders[axis].check(self._commanded_steps(axis))
+        finally:
+            lock.release()
+    
+    def _tracking_step(self, axis, direction, commanded=True):
+        """
+        Emit one step from the tracking loop unless a slew owns the axis
+        
+        Encoder corrections pass commanded=False: they bring the axis to
+        the commanded position instead of moving it.
+        """
+        if axis == AXIS_RA:
+            lock, step_pin, dir_pin, limits = self.ra_lock, self.STEP_PIN_RA, self.DIR_PIN_RA, self.ra_limits
+        else:
+            lock, step_pin, dir_pin, limits = self.dec_lock, self.STEP_PIN_DEC, self.DIR_PIN_DEC, self.dec_limits
+        
+        if not lock.acquire(blocking=False):
+            return False
+        try:
+            # A slew may have left the direction pin reversed
+            GPIO.output(dir_pin, GPIO.HIGH if direction > 0 else GPIO.LOW)
+            if axis == AXIS_DEC:
+                GPIO.output(self.ENABLE_PIN_DEC, GPIO.LOW)
+            
+            # On a reversal (e.g. a DEC guide correction changing sign) the lash
+            # is run out at slew speed, ramping straight into this step
+            take_up = self.backlash[axis].take_up(direction)
+            if take_up:
+                for interval in ramp_intervals(take_up + 1, limits.max_rate, limits.max_accel)[:take_up]:
+                    GPIO.output(step_pin, GPIO.HIGH)
+                    if self.trace is not None:
+                        self.trace.record(axis, direction)
+                    GPIO.output(step_pin, GPIO.LOW)
+                    time.sleep(interval)
+            
+            GPIO.output(step_pin, GPIO.HIGH)
+            if self.trace is not None:
+                self.trace.record(axis, direction)
+            GPIO.output(step_pin, GPIO.LOW)
+            
+            # RA tracking steps follow the sky and are not added to ra_position
+            if commanded and axis == AXIS_RA:
+                self.tracking_steps += 1
+            elif commanded:
+                self.dec_position += direction / self.STEPS_PER_DEG
+                self.snapshot.dec_steps += direction
+        finally:
+            lock.release()
+        return True
     
     def cleanup(self):
         """Clean up resources"""
@@ -216,6 +769,20 @@ class IndiTelescopeDriver(PyIndi.BaseClient):
         if self.is_tracking:
             self.stop_tracking()
         
+        # Push the final state and stop publishing
+        self.publisher.stop()
+        
+        # Release the encoder edge backends
+        for encoder in self.encoders.values():
+            encoder.stop()
+        
+        # Write out the remaining motion trace
+        if self.trace is not None:
+            self.trace.close()
+        
+        # Log the remaining telemetry events
+        self.telemetry.stop()
+        
         # Disable motors
         GPIO.output(self.ENABLE_PIN_RA, GPIO.HIGH)
         GPIO.output(self.ENABLE_PIN_DEC, GPIO.HIGH)
@@ -227,9 +794,20 @@ class IndiTelescopeDriver(PyIndi.BaseClient):
 
 def main():
     """Main function to run the INDI telescope driver"""
+    global log_handler
+    # Records are written by a background thread so the motion loops never
+    # wait on the console (stderr - under indiserver stdout carries INDI)
+    log_handler, _ = setup_logging(level=logging.INFO)
+    
     driver = IndiTelescopeDriver()
     
     try:
+        if INDI_DEVICE_MODE:
+            # indiserver owns stdin/stdout; run until it closes them
+            device = driver.start_device()
+            device.closed.wait()
+            return
+        
         # Connect to INDI server
         if not driver.connect_server():
             sys.exit(1)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Step timing profiles and per-mount tuning limits
+Builds acceleration ramps for slews, tracks gear backlash per axis and
+loads/saves the tuning profile written by characterize.py
+"""
+import os
+import json
+import math
+import logging
+
+logger = logging.getLogger('TelescopeDriver.profile')
+
+DEFAULT_PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tuning_profile.json")
+
+
+class AxisLimits:
+    """Maximum reliable step rate (steps/s) and acceleration (steps/s²) of one axis"""
+
+    def __init__(self, max_rate, max_accel=None):
+        self.max_rate = max_rate
+        self.max_accel = max_accel
+
+    def __repr__(self):
+        return f"AxisLimits(max_rate={self.max_rate!r}, max_accel={self.max_accel!r})"
+
+
+class BacklashCompensator:
+    """
+    Tracks the last direction of one axis and the gear lash to take up on reversal
+
+    The take-up steps are added to the front of the reversing move, so they
+    run inside the same acceleration ramp instead of as a separate move.
+
+    Args:
+        steps: Backlash in microsteps
+    """
+
+    def __init__(self, steps=0):
+        self.steps = steps
+        self.direction = 0      # Last direction moved, 0 until the first move
+        self.reversals = 0
+
+    def take_up(self, direction):
+        """Record a move in direction (+1/-1); returns the lash steps to prepend"""
+        reversing = self.direction != 0 and direction != self.direction
+        self.direction = direction
+        if not reversing or not self.steps:
+            return 0
+        self.reversals += 1
+        return self.steps
+
+
+def ramp_intervals(steps, max_rate, accel=None, start_rate=None):
+    """
+    Seconds between consecutive steps for a trapezoidal move
+
+    The rate ramps up at constant acceleration, cruises at max_rate and ramps
+    down symmetrically; short moves become triangular automatically.
+
+    Args:
+        steps: Number of steps in the move
+        max_rate: Cruise rate in steps/s
+        accel: Acceleration in steps/s² (None runs the whole move at max_rate)
+        start_rate: Rate of the first and last step (defaults to the rate
+            reached one step after starting from rest)
+
+    Returns:
+        List of step intervals in seconds, one per step
+    """
+    if steps <= 0:
+        return []
+    if not accel:
+        return [1.0 / max_rate] * steps
+
+    if start_rate is None:
+        start_rate = math.sqrt(2.0 * accel)
+    v0_sq = min(start_rate, max_rate) ** 2
+    two_a = 2.0 * accel
+    last = steps - 1
+    return [
+        1.0 / min(max_rate, math.sqrt(v0_sq + two_a * min(i, last - i)))
+        for i in range(steps)
+    ]
+
+
+def move_duration(steps, max_rate, accel=None):
+    """Time in seconds for a move built by ramp_intervals (starting from rest)"""
+    if steps <= 0:
+        return 0.0
+    if not accel:
+        return steps / max_rate
+
+    # Steps needed to reach the cruise rate from rest
+    ramp_steps = max_rate ** 2 / (2.0 * accel)
+    if 2 * ramp_steps >= steps:
+        return 2.0 * math.sqrt(steps / accel)
+    return steps / max_rate + max_rate / accel
+
+
+def load_tuning_profile(path=DEFAULT_PROFILE_PATH):
+    """Load a tuning profile, returning an empty profile if none was written yet"""
+    if not os.path.exists(path):
+        logger.info(f"No tuning profile at {path}, using default step timing")
+        return {}
+
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to read tuning profile {path}: {e}")
+        return {}
+
+    logger.info(f"Loaded tuning profile from {path}")
+    return profile
+
+
+def save_tuning_profile(profile, path=DEFAULT_PROFILE_PATH):
+    """Write a tuning profile as JSON"""
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2, sort_keys=True)
+    logger.info(f"Tuning profile written to {path}")
+
+
+def set_axis_limits(profile, axis, microsteps, limits):
+    """Store limits for an axis ("RA"/"DEC") at a microstep setting"""
+    entry = profile.setdefault(axis, {}).setdefault(str(microsteps), {})
+    entry['max_rate'] = limits.max_rate
+    entry['max_accel'] = limits.max_accel
+
+
+def set_axis_backlash(profile, axis, microsteps, steps):
+    """Store the measured backlash (microsteps) for an axis at a microstep setting"""
+    profile.setdefault(axis, {}).setdefault(str(microsteps), {})['backlash'] = steps
+
+
+def axis_limits(profile, axis, microsteps, default):
+    """Limits for an axis at a microstep setting, or default if not characterized"""
+    entry = profile.get(axis, {}).get(str(microsteps))
+    if entry is None or 'max_rate' not in entry:
+        return default
+    return AxisLimits(entry['max_rate'], entry.get('max_accel'))
+
+
+def axis_backlash(profile, axis, microsteps):
+    """Measured backlash in microsteps for an axis, or 0 if not measured"""
+    return profile.get(axis, {}).get(str(microsteps), {}).get('backlash', 0)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Compact binary motion trace recorder and offline replayer/analyzer
+Records every emitted step edge (axis, direction, monotonic timestamp) so a
+misbehaving slew or tracking session can be reconstructed afterwards
+
+File format (little endian):
+    header  - magic b'OCTRACE1', uint64 record count,
+              int64 wall clock ns and int64 monotonic ns at recording start
+    records - one int64 per step edge: (monotonic_ns << 2) | (axis << 1) | dir
+"""
+import os
+import sys
+import time
+import mmap
+import struct
+import argparse
+import threading
+import logging
+from array import array
+from collections import deque
+from queue import SimpleQueue
+
+logger = logging.getLogger('TelescopeDriver.trace')
+
+AXIS_RA = 0
+AXIS_DEC = 1
+AXIS_NAMES = {AXIS_RA: "RA", AXIS_DEC: "DEC"}
+
+TRACE_MAGIC = b'OCTRACE1'
+HEADER = struct.Struct('<8sQqq')
+RECORD_SIZE = 8
+GROW_BYTES = 1 << 20   # Grow the mapped file 1 MiB at a time
+
+
+class MotionTraceRecorder:
+    """Records step edges into preallocated buffers, flushed to a mmap'd file
+
+    record() only writes one int64 into the active buffer. Full buffers are
+    handed to a background thread that copies them into the memory-mapped
+    file, so the step loops never wait on disk I/O. If every spare buffer is
+    still being written, edges are dropped and counted rather than blocking.
+    """
+
+    def __init__(self, path, buffer_size=65536, spare_buffers=3):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.dropped = 0
+        self.recorded = 0
+
+        # Preallocate all buffers up front - nothing is allocated per step
+        empty = bytes(RECORD_SIZE * buffer_size)
+        self._buffer = array('q', empty)
+        self._free = deque(array('q', empty) for _ in range(spare_buffers))
+        self._index = 0
+        self._lock = threading.Lock()
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        self._mapped_size = HEADER.size + GROW_BYTES
+        os.ftruncate(self._fd, self._mapped_size)
+        self._mm = mmap.mmap(self._fd, self._mapped_size)
+        self._count = 0
+        HEADER.pack_into(self._mm, 0, TRACE_MAGIC, 0, time.time_ns(), time.monotonic_ns())
+
+        self._pending = SimpleQueue()
+        self._flusher = threading.Thread(target=self._flush_worker, name='TraceFlusher')
+        self._flusher.daemon = True
+        self._flusher.start()
+
+        logger.info(f"Recording motion trace to {path}")
+
+    def record(self, axis, direction):
+        """Record one step edge (hot path)"""
+        with self._lock:
+            i = self._index
+            if i == self.buffer_size:
+                if not self._swap_buffer():
+                    self.dropped += 1
+                    return
+                i = 0
+            self._buffer[i] = (time.monotonic_ns() << 2) | (axis << 1) | (1 if direction > 0 else 0)
+            self._index = i + 1
+
+    def flush(self):
+        """Hand the partially filled buffer to the flusher thread"""
+        with self._lock:
+            if self._index:
+                self._swap_buffer()
+
+    def close(self):
+        """Flush everything, trim the file to its final size and close it"""
+        # Let the flusher finish the queued buffers, then write the active
+        # one directly - there may be no free buffer left to swap it for
+        self._pending.put((None, 0))
+        self._flusher.join()
+        with self._lock:
+            if self._index:
+                self._write(self._buffer, self._index)
+                self.recorded += self._index
+                self._index = 0
+
+        self._mm.flush()
+        self._mm.close()
+        os.ftruncate(self._fd, HEADER.size + self._count * RECORD_SIZE)
+        os.close(self._fd)
+        logger.info(f"Motion trace closed: {self._count} edges, {self.dropped} dropped")
+
+    def _swap_buffer(self):
+        """Queue the active buffer for writing and switch to a free one"""
+        if not self._free:
+            return False
+        self._pending.put((self._buffer, self._index))
+        self.recorded += self._index
+        self._buffer = self._free.popleft()
+        self._index = 0
+        return True
+
+    def _flush_worker(self):
+        """Background thread copying full buffers into the mapped file"""
+        while True:
+            buffer, count = self._pending.get()
+            if buffer is None:
+                break
+            self._write(buffer, count)
+            self._free.append(buffer)
+
+    def _write(self, buffer, count):
+        """Append count records from buffer to the mapped file"""
+        chunk = buffer[:count]
+        if sys.byteorder != 'little':
+            chunk.byteswap()
+
+        offset = HEADER.size + self._count * RECORD_SIZE
+        end = offset + count * RECORD_SIZE
+        if end > self._mapped_size:
+            self._mm.close()
+            self._mapped_size = end + GROW_BYTES
+            os.ftruncate(self._fd, self._mapped_size)
+            self._mm = mmap.mmap(self._fd, self._mapped_size)
+
+        self._mm[offset:end] = chunk.tobytes()
+        self._count += count
+        # Update the header last so a crash leaves a readable file
+        struct.pack_into('<Q', self._mm, len(TRACE_MAGIC), self._count)
+
+
+class MotionTrace:
+    """Decoded step edges loaded from a trace file"""
+
+    def __init__(self, records, wall_ns=0, mono_ns=0):
+        self.records = records
+        self.wall_ns = wall_ns
+        self.mono_ns = mono_ns
+
+    def __len__(self):
+        return len(self.records)
+
+    def edges(self, axis=None):
+        """Yield (t_ns, axis, direction) for every edge, optionally for one axis"""
+        for record in self.records:
+            edge_axis = (record >> 1) & 1
+            if axis is None or edge_axis == axis:
+                yield record >> 2, edge_axis, 1 if record & 1 else -1
+
+
+def load_trace(path):
+    """Load a trace file written by MotionTraceRecorder"""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, count, wall_ns, mono_ns = HEADER.unpack_from(mm, 0)
+            if magic != TRACE_MAGIC:
+                raise ValueError(f"{path} is not a motion trace file")
+            records = array('q')
+            records.frombytes(mm[HEADER.size:HEADER.size + count * RECORD_SIZE])
+
+    if sys.byteorder != 'little':
+        records.byteswap()
+    return MotionTrace(records, wall_ns, mono_ns)
+
+
+def velocity_profile(trace, axis, steps_per_deg):
+    """
+    Reconstruct the velocity profile of one axis from its step edges
+
+    Returns:
+        List of (seconds since first edge, signed velocity in deg/s)
+    """
+    profile = []
+    t_first = None
+    t_prev = None
+    for t_ns, _, direction in trace.edges(axis):
+        if t_first is None:
+            t_first = t_ns
+        elif t_ns > t_prev:
+            velocity = direction * 1e9 / (t_ns - t_prev) / steps_per_deg
+            profile.append(((t_ns - t_first) / 1e9, velocity))
+        t_prev = t_ns
+    return profile
+
+
+def timing_error(trace, axis, expected_interval=None):
+    """
+    Compare step intervals of one axis against the expected step interval
+
+    Args:
+        expected_interval: Commanded seconds between steps; defaults to the
+            median interval, which measures jitter rather than absolute error
+
+    Returns:
+        Dict with interval count, expected interval, mean/rms/max error in seconds
+    """
+    times = [t_ns for t_ns, _, _ in trace.edges(axis)]
+    intervals = [(b - a) / 1e9 for a, b in zip(times, times[1:])]
+    if not intervals:
+        return {'intervals': 0, 'expected': expected_interval,
+                'mean_error': 0.0, 'rms_error': 0.0, 'max_error': 0.0}
+
+    if expected_interval is None:
+        expected_interval = sorted(intervals)[len(intervals) // 2]
+
+    errors = [interval - expected_interval for interval in intervals]
+    return {
+        'intervals': len(intervals),
+        'expected': expected_interval,
+        'mean_error': sum(errors) / len(errors),
+        'rms_error': (sum(e * e for e in errors) / len(errors)) ** 0.5,
+        'max_error': max(errors, key=abs),
+    }
+
+
+def replay_trace(trace, gpio, step_pins, dir_pins, sleep=time.sleep, speed=1.0):
+    """
+    Feed a recorded trace back into a GPIO backend (e.g. a simulated mount)
+
+    Args:
+        gpio: Object with output(pin, value) and HIGH/LOW, like RPi.GPIO
+        step_pins: Dict mapping axis to STEP pin
+        dir_pins: Dict mapping axis to DIR pin
+        sleep: Sleep function; a simulator's virtual sleep replays instantly
+        speed: Time scale factor, 2.0 replays twice as fast
+    """
+    t_start = None
+    t_elapsed = 0.0
+    directions = {}
+    for t_ns, axis, direction in trace.edges():
+        if t_start is None:
+            t_start = t_ns
+
+        # Wait until this edge is due relative to the first edge
+        t_due = (t_ns - t_start) / 1e9 / speed
+        if t_due > t_elapsed:
+            sleep(t_due - t_elapsed)
+            t_elapsed = t_due
+
+        if directions.get(axis) != direction:
+            gpio.output(dir_pins[axis], gpio.HIGH if direction > 0 else gpio.LOW)
+            directions[axis] = direction
+        gpio.output(step_pins[axis], gpio.HIGH)
+        gpio.output(step_pins[axis], gpio.LOW)
+
+
+def main():
+    """Print a per-axis summary of a motion trace file"""
+    parser = argparse.ArgumentParser(description="Analyze a motion trace file")
+    parser.add_argument('path', help="Trace file written by the telescope driver")
+    parser.add_argument('--steps-per-deg', type=float, default=200 * 16 * 100 / 360,
+                        help="Microsteps per axis degree (default matches indi_telescope.py)")
+    args = parser.parse_args()
+
+    trace = load_trace(args.path)
+    print(f"Trace: {args.path}")
+    print(f"Edges: {len(trace)}")
+
+    for axis, name in AXIS_NAMES.items():
+        profile = velocity_profile(trace, axis, args.steps_per_deg)
+        if not profile:
+            continue
+        error = timing_error(trace, axis)
+        peak = max(abs(v) for _, v in profile)
+        print(f"\n{name} axis:")
+        print(f"  Duration:       {profile[-1][0]:.3f} s")
+        print(f"  Peak velocity:  {peak:.4f} deg/s")
+        print(f"  Step interval:  {error['expected'] * 1e6:.1f} us (median)")
+        print(f"  Timing error:   rms {error['rms_error'] * 1e6:.1f} us, "
+              f"max {error['max_error'] * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
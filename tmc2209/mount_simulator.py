@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Physics-based virtual mount for testing without a Raspberry Pi
+Provides a drop-in replacement for RPi.GPIO that feeds STEP/DIR pulses into
+a stepper rotor + geared load model and flags missed steps whenever the
+commanded pulse stream is faster than the motor could follow
+"""
+import math
+import time
+import argparse
+import logging
+
+logger = logging.getLogger('TelescopeDriver.simulator')
+
+# Integration settings
+MAX_SUBSTEP = 50e-6     # Longest physics integration step in seconds
+SETTLE_TIME = 0.05      # Idle time after which a resting rotor is snapped to equilibrium
+ROTOR_TEETH = 50        # Electrical cycles per revolution of a 1.8° hybrid stepper
+
+
+class StepperModel:
+    """
+    Single axis model: microstepping driver, hybrid stepper rotor and geared load
+
+    The rotor is pulled towards the commanded electrical angle with a torque
+    of T_pullout(speed) * sin(error). Once the electrical error exceeds half
+    a cycle the rotor falls into a neighbouring pole and the lost full steps
+    are recorded as missed steps.
+
+    Args:
+        steps_per_rev: Full steps per motor revolution
+        microsteps: Driver microstepping factor
+        gear_ratio: Motor revolutions per axis revolution
+        holding_torque: Motor holding torque in N·m
+        corner_speed: Motor speed (rad/s) where available torque has halved
+        rotor_inertia: Rotor inertia in kg·m²
+        load_inertia: Load inertia at the axis in kg·m² (reflected through the gearbox)
+        friction_torque: Coulomb friction at the motor shaft in N·m
+        damping: Viscous damping at the motor shaft in N·m·s/rad
+        backlash: Gear lash between motor and axis in microsteps
+    """
+
+    def __init__(self, steps_per_rev=200, microsteps=16, gear_ratio=100,
+                 holding_torque=0.45, corner_speed=20.0, rotor_inertia=5.4e-6,
+                 load_inertia=0.2, friction_torque=0.01, damping=0.005, backlash=0):
+        self.steps_per_rev = steps_per_rev
+        self.microsteps = microsteps
+        self.gear_ratio = gear_ratio
+        self.holding_torque = holding_torque
+        self.corner_speed = corner_speed
+        self.inertia = rotor_inertia + load_inertia / gear_ratio ** 2
+        self.friction_torque = friction_torque
+        self.damping = damping
+        self.backlash = backlash
+
+        # Electrical radians per microstep and microsteps per electrical cycle
+        self.cycle_microsteps = 4 * microsteps
+        self.elec_per_microstep = 2 * math.pi / self.cycle_microsteps
+
+        self.reset()
+
+    def reset(self):
+        """Return the axis to rest at position zero"""
+        self.t = 0.0
+        self.commanded = 0          # Commanded microsteps
+        self.slip = 0               # Microsteps lost to stalls (commanded - achievable)
+        self.rotor = 0.0            # Rotor electrical angle in radians
+        self.velocity = 0.0         # Rotor speed in electrical rad/s
+        self.missed_steps = 0       # Total microsteps lost
+        self.stall_events = []      # (time, microsteps lost) per stall
+        self.load = 0.0             # Axis position in microsteps, within the lash of the rotor
+
+    def pullout_torque(self, speed):
+        """Available torque at the given motor speed in mechanical rad/s"""
+        return self.holding_torque / (1.0 + abs(speed) / self.corner_speed)
+
+    @property
+    def position(self):
+        """Rotor position in microsteps"""
+        return self.rotor / self.elec_per_microstep
+
+    @property
+    def axis_degrees(self):
+        """Actual axis angle in degrees, including any missed steps and lash"""
+        steps_per_deg = self.steps_per_rev * self.microsteps * self.gear_ratio / 360
+        return self.load / steps_per_deg
+
+    def step(self, t, direction):
+        """Advance the physics to time t, then apply one commanded microstep"""
+        self.advance(t)
+        self.commanded += 1 if direction > 0 else -1
+
+    def advance(self, t):
+        """Integrate the rotor dynamics up to time t"""
+        dt_total = t - self.t
+        if dt_total <= 0:
+            return
+
+        # A rotor that has been resting on its target needs no integration
+        if dt_total > SETTLE_TIME:
+            self._integrate(SETTLE_TIME)
+            if abs(self.velocity) < 1e-3:
+                self.rotor = (self.commanded - self.slip) * self.elec_per_microstep
+                self.velocity = 0.0
+                self.t = t
+                self._drag_load()
+                return
+            dt_total = t - self.t
+
+        self._integrate(dt_total)
+
+    def _integrate(self, duration):
+        """Semi-implicit Euler integration over duration seconds"""
+        substeps = max(1, math.ceil(duration / MAX_SUBSTEP))
+        dt = duration / substeps
+        target = (self.commanded - self.slip) * self.elec_per_microstep
+        # Motor shaft quantities are mechanical; the state is kept electrical
+        to_mech = 1.0 / ROTOR_TEETH
+        torque_per_accel = self.inertia * to_mech
+
+        rotor = self.rotor
+        velocity = self.velocity
+        for _ in range(substeps):
+            speed = velocity * to_mech
+            torque = self.pullout_torque(speed) * math.sin(target - rotor) - self.damping * speed
+            if velocity > 0:
+                torque -= self.friction_torque
+            elif velocity < 0:
+                torque += self.friction_torque
+            velocity += torque / torque_per_accel * dt
+            rotor += velocity * dt
+
+        self.rotor = rotor
+        self.velocity = velocity
+        self.t += duration
+        self._check_slip(target)
+        self._drag_load()
+
+    def _drag_load(self):
+        """Move the axis only once the rotor has crossed the gear lash"""
+        position = self.position
+        if self.load > position:
+            self.load = position
+        elif self.load < position - self.backlash:
+            self.load = position - self.backlash
+
+    def _check_slip(self, target):
+        """Detect the rotor falling behind or ahead by more than half a cycle"""
+        error = target - self.rotor
+        if abs(error) <= math.pi:
+            return
+
+        # The rotor now sits in the pole whole cycles away from the command
+        cycles = round(error / (2 * math.pi))
+        lost = cycles * self.cycle_microsteps
+        self.slip += lost
+        self.missed_steps += abs(lost)
+        self.stall_events.append((self.t, lost))
+        logger.warning(f"Missed {abs(lost)} microsteps at t={self.t:.4f}s")
+
+
+class SimulatedEncoder:
+    """
+    Quadrature encoder on the axis of a StepperModel
+
+    Implements the encoders.py edge backend interface. poll() advances the
+    model to the current time and emits the A/B transitions for every count
+    the axis moved, so the decoder sees missed steps as the real axis would.
+
+    Args:
+        model: StepperModel whose actual axis angle is measured
+        counts_per_rev: Quadrature counts per axis revolution
+        clock: Time source, e.g. SimulatedGPIO.time
+    """
+    GRAY_CODE = ((0, 0), (0, 1), (1, 1), (1, 0))
+
+    def __init__(self, model, counts_per_rev, clock):
+        self.model = model
+        self.counts_per_rev = counts_per_rev
+        self.clock = clock
+        self.count = 0
+        self.decoder = None
+
+    def start(self, decoder):
+        self.decoder = decoder
+        self.count = self._measured_count()
+        decoder.update(*self.GRAY_CODE[self.count % 4])
+
+    def poll(self):
+        self.model.advance(self.clock())
+        target = self._measured_count()
+        step = 1 if target > self.count else -1
+        while self.count != target:
+            self.count += step
+            self.decoder.update(*self.GRAY_CODE[self.count % 4])
+
+    def stop(self):
+        self.decoder = None
+
+    def _measured_count(self):
+        return math.floor(self.model.axis_degrees / 360.0 * self.counts_per_rev)
+
+
+class SimulatedGPIO:
+    """
+    Drop-in replacement for the RPi.GPIO module driving simulated axes
+
+    With clock=None the simulator keeps its own virtual clock that only
+    advances through sleep(), so pulse streams run faster than real time.
+    Pass clock=time.monotonic to drive it from code using time.sleep.
+    """
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+
+    def __init__(self, clock=None):
+        self._clock = clock
+        self.now = 0.0
+        self.mode = None
+        self.pins = {}
+        self.axes = {}          # name -> (model, step_pin, dir_pin, enable_pin)
+        self._step_pins = {}    # step pin -> axis name
+
+    def attach_axis(self, name, model, step_pin, dir_pin, enable_pin=None):
+        """Connect a StepperModel to STEP/DIR/EN pins"""
+        self.axes[name] = (model, step_pin, dir_pin, enable_pin)
+        self._step_pins[step_pin] = name
+
+    def time(self):
+        """Current simulation time in seconds"""
+        if self._clock is not None:
+            return self._clock()
+        return self.now
+
+    def sleep(self, seconds):
+        """Advance the virtual clock (or really sleep when using a real clock)"""
+        if self._clock is not None:
+            time.sleep(seconds)
+        else:
+            self.now += seconds
+
+    # RPi.GPIO compatible API
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, direction, pull_up_down=None, initial=None):
+        self.pins[pin] = self.LOW if initial is None else initial
+
+    def input(self, pin):
+        return self.pins.get(pin, self.LOW)
+
+    def output(self, pin, value):
+        previous = self.pins.get(pin, self.LOW)
+        self.pins[pin] = value
+
+        # A rising STEP edge on an enabled driver moves the axis
+        name = self._step_pins.get(pin)
+        if name is not None and value and not previous:
+            model, _, dir_pin, enable_pin = self.axes[name]
+            if enable_pin is None or not self.pins.get(enable_pin, self.LOW):
+                model.step(self.time(), 1 if self.pins.get(dir_pin, self.LOW) else -1)
+
+    def cleanup(self):
+        for model, _, _, _ in self.axes.values():
+            model.advance(self.time())
+        self.pins.clear()
+
+
+def run_pulse_train(model, rate, steps, start_rate=None, accel=None):
+    """
+    Run a pulse stream through a fresh model on a virtual clock
+
+    Args:
+        rate: Target step rate in microsteps/s
+        steps: Number of microsteps to command
+        start_rate: Initial step rate (defaults to rate, i.e. no ramp)
+        accel: Ramp acceleration in microsteps/s² (None jumps straight to rate)
+
+    Returns:
+        Number of microsteps the model missed
+    """
+    model.reset()
+    t = 0.0
+    current = start_rate or rate
+    for _ in range(steps):
+        model.step(t, 1)
+        interval = 1.0 / current
+        t += interval
+        if accel and current < rate:
+            current = min(rate, current + accel * interval)
+    # Let the rotor catch up (or stall) after the last pulse
+    model.advance(t + SETTLE_TIME)
+    return model.missed_steps
+
+
+def find_max_rate(model, steps=2000, start_rate=None, accel=None,
+                  low=100.0, high=200000.0, tolerance=0.02):
+    """Binary search the highest step rate that runs without missed steps"""
+    if run_pulse_train(model, low, steps, start_rate, accel):
+        return 0.0
+    while high - low > tolerance * low:
+        mid = (low + high) / 2
+        if run_pulse_train(model, mid, steps, start_rate, accel):
+            high = mid
+        else:
+            low = mid
+    return low
+
+
+def main():
+    """Benchmark step rates against the simulated mount"""
+    parser = argparse.ArgumentParser(description="Simulated mount step-rate benchmark")
+    parser.add_argument('--microsteps', type=int, default=16)
+    parser.add_argument('--gear-ratio', type=float, default=100)
+    parser.add_argument('--load-inertia', type=float, default=0.2, help="Axis load inertia in kg·m²")
+    parser.add_argument('--holding-torque', type=float, default=0.45, help="Motor holding torque in N·m")
+    parser.add_argument('--accel', type=float, default=20000, help="Ramp acceleration in microsteps/s²")
+    args = parser.parse_args()
+
+    # The rate search stalls the motor on purpose; don't log every stall
+    logger.setLevel(logging.ERROR)
+
+    model = StepperModel(microsteps=args.microsteps, gear_ratio=args.gear_ratio,
+                         holding_torque=args.holding_torque, load_inertia=args.load_inertia)
+    steps_per_deg = model.steps_per_rev * model.microsteps * model.gear_ratio / 360
+
+    print("Simulated Mount Benchmark")
+    print("=========================")
+    wall_start = time.perf_counter()
+
+    max_start = find_max_rate(model)
+    print(f"Max rate without ramp:  {max_start:8.0f} steps/s ({max_start / steps_per_deg:.3f} deg/s)")
+
+    max_ramped = find_max_rate(model, steps=20000, start_rate=max_start / 2, accel=args.accel)
+    print(f"Max rate with ramp:     {max_ramped:8.0f} steps/s ({max_ramped / steps_per_deg:.3f} deg/s)")
+
+    # The driver's fixed move_ra/move_dec delay: 0.0002s high + 0.0002s low
+    missed = run_pulse_train(model, 1 / 0.0004, 20000)
+    print(f"\nDriver slew rate (2500 steps/s): {'✓ no missed steps' if not missed else f'✗ {missed} missed steps'}")
+
+    print(f"\nBenchmark took {time.perf_counter() - wall_start:.2f}s wall clock")
+
+
+if __name__ == "__main__":
+    main()
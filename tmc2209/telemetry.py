@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Non-blocking logging and telemetry for the motion threads
+Log records go through a bounded queue to a background listener, and hot-path
+diagnostics are written into a preallocated ring that a background thread
+formats and logs, so pulse generation never waits on I/O
+"""
+import os
+import sys
+import atexit
+import time
+import queue
+import logging
+import logging.handlers
+import threading
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when full"""
+
+    def __init__(self, log_queue):
+        super(DroppingQueueHandler, self).__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Formatting is left to the listener thread; the queue never leaves
+        # this process, so the record does not need to be made picklable
+        return record
+
+
+def setup_logging(level=logging.INFO, capacity=1024, stream=None):
+    """
+    Route the root logger through a bounded queue to a background writer
+
+    Returns:
+        (DroppingQueueHandler, QueueListener) - the listener is stopped, and
+        the queue flushed, at interpreter exit
+    """
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=capacity))
+    listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return handler, listener
+
+
+class TelemetryRing:
+    """
+    Bounded ring of preallocated telemetry records
+
+    Events are registered once with a level and a format string. emit()
+    copies a timestamp, the event id and two values into the next free slot,
+    taking only a short lock, and never formats or does I/O. A background
+    thread drains the ring every interval seconds and logs the formatted
+    messages. When the ring is full, new records are dropped and counted.
+
+    Args:
+        logger: Logger the drained records are written to
+        capacity: Number of preallocated records
+        interval: Seconds between drains
+    """
+
+    def __init__(self, logger, capacity=4096, interval=0.1):
+        self.logger = logger
+        self.capacity = capacity
+        self.interval = interval
+        self.emitted = 0
+        self.dropped = 0
+
+        # Slots are [monotonic time, event id, a, b], reused forever
+        self._slots = [[0.0, 0, 0, 0] for _ in range(capacity)]
+        self._head = 0      # Next slot to write
+        self._tail = 0      # Next slot to read
+        self._lock = threading.Lock()
+        self._events = []   # event id -> (level, format string)
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def event(self, level, fmt):
+        """Register an event; fmt may use {a} and {b}, the values passed to emit()"""
+        self._events.append((level, fmt))
+        return len(self._events) - 1
+
+    def emit(self, event_id, a=0, b=0):
+        """Record an event from a motion thread (hot path)"""
+        with self._lock:
+            head = self._head
+            if head - self._tail >= self.capacity:
+                self.dropped += 1
+                return
+            slot = self._slots[head % self.capacity]
+            slot[0] = time.monotonic()
+            slot[1] = event_id
+            slot[2] = a
+            slot[3] = b
+            self._head = head + 1
+            self.emitted += 1
+
+    def start(self):
+        """Start the drain thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='TelemetryDrain')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the drain thread after writing out everything left in the ring"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.drain()
+
+    def stats(self):
+        """Counters for monitoring the pipeline"""
+        return {
+            'emitted': self.emitted,
+            'dropped': self.dropped,
+            'pending': self._head - self._tail,
+        }
+
+    def drain(self):
+        """Format and log every pending record; returns the number written"""
+        logger = self.logger
+        # Records carry the time of the event, not the time of the drain
+        wall_offset = time.time() - time.monotonic()
+        written = 0
+        while self._tail < self._head:
+            slot = self._slots[self._tail % self.capacity]
+            # Copy out before releasing the slot to writers
+            t, event_id, a, b = slot
+            self._tail += 1
+
+            level, fmt = self._events[event_id]
+            if logger.isEnabledFor(level):
+                record = logger.makeRecord(logger.name, level, "(telemetry)", 0,
+                                           fmt.format(a=a, b=b), None, None)
+                record.created = t + wall_offset
+                record.msecs = (record.created - int(record.created)) * 1000
+                logger.handle(record)
+            written += 1
+        return written
+
+    def _run(self):
+        """Drain thread"""
+        while not self._stop.wait(self.interval):
+            self.drain()
+
+
+def benchmark(iterations=200000):
+    """
+    Measure the per-call cost of the logging options inside a step loop
+
+    Returns:
+        Dict of nanoseconds per call above an empty loop
+    """
+    null_stream = open(os.devnull, 'w')
+    bench_logger = logging.getLogger('TelemetryBenchmark')
+    bench_logger.propagate = False
+    bench_logger.setLevel(logging.INFO)
+
+    def per_call(fn):
+        start = time.perf_counter()
+        for i in range(iterations):
+            fn(i)
+        return (time.perf_counter() - start) / iterations * 1e9
+
+    baseline = per_call(lambda i: None)
+    results = {}
+
+    # Synchronous stream handler, as logging.basicConfig sets up
+    direct = logging.StreamHandler(null_stream)
+    direct.setFormatter(logging.Formatter(LOG_FORMAT))
+    bench_logger.addHandler(direct)
+    results['logger.info (stream handler)'] = per_call(lambda i: bench_logger.info("step %d", i)) - baseline
+    bench_logger.removeHandler(direct)
+
+    # Bounded queue handler with a background listener
+    queued = DroppingQueueHandler(queue.Queue(maxsize=iterations))
+    listener = logging.handlers.QueueListener(queued.queue, direct)
+    bench_logger.addHandler(queued)
+    listener.start()
+    results['logger.info (queue handler)'] = per_call(lambda i: bench_logger.info("step %d", i)) - baseline
+    listener.stop()
+    bench_logger.removeHandler(queued)
+
+    # Preallocated telemetry ring
+    ring = TelemetryRing(bench_logger, capacity=iterations)
+    event = ring.event(logging.INFO, "step {a}")
+    results['TelemetryRing.emit'] = per_call(lambda i: ring.emit(event, i)) - baseline
+
+    null_stream.close()
+    return results
+
+
+def main():
+    """Print the per-step overhead of each logging option"""
+    print("Logging Overhead Benchmark")
+    print("==========================")
+    for name, ns in benchmark().items():
+        print(f"{name:32s} {ns:8.0f} ns per step")
+
+
+if __name__ == "__main__":
+    main()